@@ -0,0 +1,296 @@
+import argparse
+import os
+import sqlite3
+import time
+
+import pandas as pd
+
+# Sloupce vyčištěného CSV -> sloupce SQLite tabulky
+SQL_COLUMNS = {
+    "Značka": "znacka",
+    "Model": "model",
+    "Rok": "rok",
+    "Najeté km": "najete_km",
+    "Cena": "cena",
+    "Palivo": "palivo",
+    "Převodovka": "prevodovka",
+    "Výkon (kW)": "vykon_kw",
+}
+INT_COLUMNS = ["Rok", "Najeté km", "Cena", "Výkon (kW)"]
+
+CENA_INDEX = "idx_cena_filtry"
+
+# Indexy pro typické dotazy. První je krycí pro "cena modelu v roce s palivem
+# a do X km" – rovnosti na začátku, pak cena (pořadí pro percentily) a km.
+INDEXES = {
+    "idx_model_rok_palivo_cena": ("znacka", "model", "rok", "palivo", "cena", "najete_km"),
+    "idx_rok_palivo_cena": ("rok", "palivo", "cena"),
+    "idx_palivo_prevodovka_cena": ("palivo", "prevodovka", "cena"),
+    # Percentily pro filtry, které neodpovídají začátku žádného indexu výše (bez filtru,
+    # jen km, výkon, ...): index se prochází v pořadí ceny a filtry se vyhodnotí
+    # přímo na jeho sloupcích, bez čtení tabulky a bez řazení
+    CENA_INDEX: ("cena", "rok", "najete_km", "vykon_kw", "palivo", "prevodovka", "znacka", "model"),
+}
+
+# Filtry dotazového API: název argumentu -> podmínka
+FILTERS = {
+    "znacka": "znacka = ?",
+    "model": "model = ?",
+    "palivo": "palivo = ?",
+    "prevodovka": "prevodovka = ?",
+    "rok": "rok = ?",
+    "rok_od": "rok >= ?",
+    "rok_do": "rok <= ?",
+    "km_od": "najete_km >= ?",
+    "km_do": "najete_km <= ?",
+    "cena_od": "cena >= ?",
+    "cena_do": "cena <= ?",
+    "vykon_od": "vykon_kw >= ?",
+    "vykon_do": "vykon_kw <= ?",
+}
+TEXT_FILTERS = ("znacka", "model", "palivo", "prevodovka")
+
+
+def build_database(csv_path="auta_cleaned.csv", db_path="auta_cleaned.sqlite", chunksize=100_000):
+    """
+    Nahraje vyčištěné CSV do SQLite databáze db_path s indexy podle INDEXES.
+
+    Databáze se staví do dočasného souboru a na místo db_path se přesune až
+    hotová, takže běžící dotazy nikdy nevidí rozpracovaná data. Indexy se
+    vytváří až po nahrání všech řádků a na konci se spustí ANALYZE pro plánovač.
+    Vrací počet nahraných řádků.
+    """
+    tmp_path = db_path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.execute("""
+            CREATE TABLE auta (
+                znacka TEXT COLLATE NOCASE,
+                model TEXT COLLATE NOCASE,
+                rok INTEGER,
+                najete_km INTEGER,
+                cena INTEGER,
+                palivo TEXT COLLATE NOCASE,
+                prevodovka TEXT COLLATE NOCASE,
+                vykon_kw INTEGER
+            )
+        """)
+        insert = f"INSERT INTO auta ({', '.join(SQL_COLUMNS.values())}) VALUES ({', '.join('?' * len(SQL_COLUMNS))})"
+        total = 0
+        for chunk in pd.read_csv(csv_path, chunksize=chunksize, usecols=list(SQL_COLUMNS),
+                                 dtype={"Značka": str, "Model": str}):
+            # tolist() dává pythonní int/str, které sqlite3 bere přímo
+            columns = [chunk[col].astype("int64").tolist() if col in INT_COLUMNS else chunk[col].tolist()
+                       for col in SQL_COLUMNS]
+            conn.executemany(insert, zip(*columns))
+            total += len(chunk)
+        for name, columns in INDEXES.items():
+            conn.execute(f"CREATE INDEX {name} ON auta ({', '.join(columns)})")
+        # Seznam hodnot textových sloupců pro porovnání bez ohledu na velikost písmen (CarDatabase._where)
+        conn.execute("CREATE TABLE hodnoty (sloupec TEXT, hodnota TEXT)")
+        for column in TEXT_FILTERS:
+            conn.execute(f"INSERT INTO hodnoty SELECT DISTINCT '{column}', {column} FROM auta WHERE {column} IS NOT NULL")
+        conn.execute("ANALYZE")
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp_path, db_path)
+    print(f"Do '{db_path}' nahráno {total} záznamů.")
+    return total
+
+
+def _interpolate(q, n, pair):
+    """
+    q-tý kvantil z n seřazených hodnot; pair(offset) vrací hodnoty na pozici offset a offset + 1.
+    """
+    if n == 0:
+        return None
+    pos = q * (n - 1)
+    offset = int(pos)
+    values = pair(offset)
+    if len(values) == 1 or pos == offset:
+        return float(values[0])
+    return values[0] + (values[1] - values[0]) * (pos - offset)
+
+
+def _where(filters):
+    """
+    Sestaví WHERE a parametry z filtrů (viz FILTERS), None filtry se ignorují.
+    """
+    conditions = []
+    params = []
+    for name, value in filters.items():
+        if value is None:
+            continue
+        if name not in FILTERS:
+            raise ValueError(f"Neznámý filtr: {name} (povolené: {', '.join(FILTERS)})")
+        conditions.append(FILTERS[name])
+        params.append(value)
+    return (" WHERE " + " AND ".join(conditions) if conditions else ""), params
+
+
+class CarDatabase:
+    """
+    Dotazy nad vyčištěnými inzeráty v SQLite (viz build_database).
+
+    Filtry se předávají jako pojmenované argumenty podle FILTERS, např.
+    db.percentile(0.5, znacka="Škoda", model="Octavia", rok=2018, palivo="Nafta", km_do=150000).
+    Textové filtry nerozlišují velikost písmen ani u diakritiky ("škoda" najde "Škoda").
+    Percentily se počítají s lineární interpolací jako pandas.Series.quantile
+    a čtou se v pořadí indexu (ORDER BY cena LIMIT/OFFSET) bez načítání a řazení dat:
+    když filtry odpovídají začátku indexu, je to otázka milisekund, jinak se
+    prochází CENA_INDEX (u milionů řádků desítky až stovky ms).
+    """
+
+    def __init__(self, path="auta_cleaned.sqlite"):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Databáze '{path}' neexistuje – vytvořte ji přes build_database().")
+        self.path = path
+        self.conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        objects = self.conn.execute("SELECT type, name FROM sqlite_master").fetchall()
+        self.indexes = {name for kind, name in objects if kind == "index"}
+        self.has_values = ("table", "hodnoty") in objects
+        self._variants = {}
+
+    def _where(self, filters):
+        """
+        _where s textovými filtry přeloženými na hodnotu uloženou v databázi.
+        COLLATE NOCASE v SQLite sjednocuje velikost jen u ASCII, "škoda" by tedy
+        "Škoda" nenašlo – ne-ASCII hodnota se proto porovná přes casefold se seznamem
+        hodnot sloupce (tabulka hodnoty, u starší databáze DISTINCT).
+        """
+        filters = dict(filters)
+        for name in TEXT_FILTERS:
+            value = filters.get(name)
+            if value is None or str(value).isascii():
+                continue
+            if name not in self._variants:
+                if self.has_values:
+                    rows = self.conn.execute("SELECT hodnota FROM hodnoty WHERE sloupec = ?", (name,))
+                else:
+                    rows = self.conn.execute(f"SELECT DISTINCT {name} FROM auta")
+                self._variants[name] = {row[0].casefold(): row[0] for row in rows if row[0] is not None}
+            filters[name] = self._variants[name].get(str(value).casefold(), value)
+        return _where(filters)
+
+    def count(self, **filters):
+        where, params = self._where(filters)
+        return self.conn.execute(f"SELECT COUNT(*) FROM auta{where}", params).fetchone()[0]
+
+    def aggregate(self, column="cena", by=None, **filters):
+        """
+        Počet, průměr, minimum a maximum sloupce column (SQL název, viz SQL_COLUMNS).
+        S by (seznam SQL sloupců) vrací slovník skupina -> statistiky.
+        """
+        if column not in SQL_COLUMNS.values():
+            raise ValueError(f"Neznámý sloupec: {column}")
+        by = list(by or ())
+        for col in by:
+            if col not in SQL_COLUMNS.values():
+                raise ValueError(f"Neznámý sloupec: {col}")
+        where, params = self._where(filters)
+        # "+sloupec" zakáže plánovači seskupovat přes index bez filtrovaných sloupců
+        # (procházel by celou tabulku); skupin je málo, seřadí se až v Pythonu
+        group = f" GROUP BY {', '.join('+' + col for col in by)}" if by else ""
+        select = ", ".join(by + [f"COUNT(*), AVG({column}), MIN({column}), MAX({column})"])
+        rows = sorted(self.conn.execute(f"SELECT {select} FROM auta{where}{group}", params).fetchall(),
+                      key=lambda row: tuple((value is None, value) for value in row[:len(by)]))
+        stats = {}
+        for row in rows:
+            key = row[:len(by)] if len(by) != 1 else row[0]
+            count, avg, low, high = row[len(by):]
+            stats[key] = {"count": count, "avg": avg, "min": low, "max": high}
+        if not by:
+            return stats[()]
+        return stats
+
+    def percentile(self, q, column="cena", **filters):
+        """
+        q-tý kvantil (0–1) sloupce column mezi záznamy podle filtrů, None bez záznamů.
+        """
+        return self.percentiles([q], column, **filters)[0]
+
+    def percentiles(self, qs, column="cena", **filters):
+        """
+        Kvantily qs najednou – počet záznamů se spočítá jen jednou.
+        """
+        if column not in SQL_COLUMNS.values():
+            raise ValueError(f"Neznámý sloupec: {column}")
+        for q in qs:
+            if not 0 <= q <= 1:
+                raise ValueError("Kvantil musí být mezi 0 a 1.")
+        where, params = self._where(filters)
+        ordered = f"SELECT {column} FROM auta{where} ORDER BY {column} LIMIT 2 OFFSET ?"
+        plan = " ".join(row[3] for row in self.conn.execute("EXPLAIN QUERY PLAN " + ordered, params + [0]))
+        if "TEMP B-TREE" in plan and column == "cena" and CENA_INDEX in self.indexes:
+            # Plánovač by vybral index podle filtrů a pro každý kvantil řadil –
+            # krycí index s cenou na začátku dá pořadí bez řazení. Počet se počítá
+            # přes stejný index, filtry se tak nikde nedohledávají v tabulce.
+            source = f"auta INDEXED BY {CENA_INDEX}"
+            ordered = f"SELECT cena FROM {source}{where} ORDER BY cena LIMIT 2 OFFSET ?"
+        elif "TEMP B-TREE" in plan:
+            # Jiný sloupec (nebo databáze bez CENA_INDEX) – místo řazení v SQLite
+            # pro každý kvantil se hodnoty načtou jednou a seřadí v Pythonu
+            values = sorted(row[0] for row in self.conn.execute(f"SELECT {column} FROM auta{where}", params))
+            return [_interpolate(q, len(values), lambda offset: values[offset:offset + 2]) for q in qs]
+        else:
+            source = "auta"
+        n = self.conn.execute(f"SELECT COUNT(*) FROM {source}{where}", params).fetchone()[0]
+        fetch = lambda offset: [row[0] for row in self.conn.execute(ordered, params + [offset])]
+        return [_interpolate(q, n, fetch) for q in qs]
+
+    def median(self, column="cena", **filters):
+        return self.percentile(0.5, column, **filters)
+
+    def price_summary(self, **filters):
+        """
+        Souhrn ceny pro filtry: počet, průměr, min, max, 10., 50. a 90. percentil.
+        """
+        summary = self.aggregate("cena", **filters)
+        summary["p10"], summary["median"], summary["p90"] = self.percentiles([0.1, 0.5, 0.9], **filters)
+        return summary
+
+    def close(self):
+        self.conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Indexovaná databáze vyčištěných inzerátů a cenové dotazy")
+    parser.add_argument("--db", default="auta_cleaned.sqlite", help="SQLite databáze")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    load = sub.add_parser("load", help="nahrát vyčištěné CSV do databáze")
+    load.add_argument("csv", nargs="?", default="auta_cleaned.csv")
+
+    query = sub.add_parser("query", help="cenový souhrn pro filtry")
+    for name, condition in FILTERS.items():
+        kind = int if condition.split()[0] in ("rok", "najete_km", "cena", "vykon_kw") else str
+        query.add_argument("--" + name.replace("_", "-"), dest=name, type=kind)
+    query.add_argument("--by", nargs="+", default=None, help="seskupit podle sloupců (např. rok)")
+    args = parser.parse_args()
+
+    if args.command == "load":
+        build_database(args.csv, args.db)
+        return
+
+    filters = {name: getattr(args, name) for name in FILTERS}
+    db = CarDatabase(args.db)
+    try:
+        start = time.perf_counter()
+        if args.by:
+            for key, stats in db.aggregate(by=args.by, **filters).items():
+                print(key, stats)
+        else:
+            for key, value in db.price_summary(**filters).items():
+                print(f"{key:>6}: {value}")
+        print(f"({(time.perf_counter() - start) * 1000:.1f} ms)")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
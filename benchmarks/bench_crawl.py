@@ -0,0 +1,198 @@
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+sys.path.insert(0, str(ROOT.parent / "scrapers"))
+
+import aaaauto_scraper
+import html_parsers
+import http_client
+import metrics
+import sauto_scraper
+from crawl_engine import CrawlEngine
+from mock_server import FIXTURES, MockSite
+from rate_limiter import AdaptiveRateLimiter
+
+SOURCES = {
+    "sauto": (sauto_scraper.extract_listing_links, sauto_scraper.parse_sauto_html),
+    "aaaauto": (aaaauto_scraper.extract_listing_links, aaaauto_scraper.parse_aaaauto_html),
+}
+
+
+def bench_parsers(repeat=200):
+    """
+    Čisté parsování uložených detailů bez sítě: µs na stránku pro každý backend.
+    """
+    manifest = json.loads((FIXTURES / "manifest.json").read_text(encoding="utf-8"))
+    results = []
+    for entry in manifest:
+        if entry["kind"] != "detail":
+            continue
+        html = (FIXTURES / entry["file"]).read_bytes()
+        parse = SOURCES[entry["source"]][1]
+        for backend in html_parsers.BACKENDS:
+            if backend == "lxml" and html_parsers.lxml is None:
+                continue
+            start = time.perf_counter()
+            for _ in range(repeat):
+                parse(entry["url"], html, backend)
+            elapsed = time.perf_counter() - start
+            results.append({"file": entry["file"], "backend": backend,
+                            "parse_us_per_page": elapsed / repeat * 1e6})
+    return results
+
+
+def _histogram(summary, name):
+    # Sečte histogram přes všechny labely (např. všechny hosty)
+    found = [h for h in summary["histograms"] if h["name"] == name]
+    count = sum(h["count"] for h in found)
+    return {
+        "count": count,
+        "mean": sum(h["sum"] for h in found) / count if count else 0.0,
+        "p95": max((h["p95"] for h in found), default=0.0),
+    }
+
+
+def _counter(summary, name):
+    return sum(c["value"] for c in summary["counters"] if c["name"] == name)
+
+
+def run_scenario(source, page_urls, workers, parse_processes, rate, results):
+    """
+    Jeden crawl proti mock serveru. Běží ve vlastním procesu, aby špička paměti
+    (ru_maxrss) patřila jen tomuto scénáři.
+    """
+    extract_links, parse_detail = SOURCES[source]
+    session = http_client.create_session(pool_size=workers)
+    limiter = AdaptiveRateLimiter(rate=rate, max_rate=rate, burst=workers)
+
+    def fetch(url, headers=None):
+        return http_client.fetch(session, url, headers, backoff_base=0.05, backoff_cap=1.0, limiter=limiter)
+
+    engine = CrawlEngine(fetch, max_workers=workers, parse_processes=parse_processes)
+    records = 0
+
+    def on_record(record):
+        nonlocal records
+        records += 1
+        return True
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        engine.run(page_urls, extract_links, parse_detail, on_record=on_record, keep_results=False)
+    elapsed = time.perf_counter() - start
+
+    summary = metrics.registry.summary()
+    parse = _histogram(summary, "parse_detail_seconds")
+    fetch_latency = _histogram(summary, "fetch_seconds")
+    # Na Linuxu je ru_maxrss v KB
+    rss_self = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    rss_children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    results.put({
+        "source": source,
+        "max_workers": workers,
+        "parse_processes": parse_processes,
+        "records": records,
+        "seconds": elapsed,
+        "pages_per_sec": records / elapsed if elapsed else 0.0,
+        "requests": _counter(summary, "http_responses_total"),
+        "retries": _counter(summary, "retries_total"),
+        "failed_fetches": _counter(summary, "fetch_failed_total"),
+        "bytes": _counter(summary, "bytes_total"),
+        "parse_us_per_page": parse["mean"] * 1e6,
+        "fetch_ms_mean": fetch_latency["mean"] * 1e3,
+        "fetch_ms_p95": fetch_latency["p95"] * 1e3,
+        "rss_peak_mb": rss_self,
+        "rss_peak_parse_workers_mb": rss_children,
+    })
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark crawlu proti lokálnímu mock serveru")
+    parser.add_argument("--sources", nargs="+", default=list(SOURCES), choices=list(SOURCES))
+    parser.add_argument("--workers", nargs="+", type=int, default=[1, 5, 10, 20],
+                        help="hodnoty max_workers, pro které se crawl změří")
+    parser.add_argument("--parse-processes", type=int, default=None,
+                        help="procesy parsovacího poolu (výchozí počet jader, 0 = vlákna)")
+    parser.add_argument("--pages", type=int, default=5)
+    parser.add_argument("--links-per-page", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05, help="zpoždění odpovědi serveru v sekundách")
+    parser.add_argument("--jitter", type=float, default=0.01)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="podíl odpovědí 503 (0–1)")
+    parser.add_argument("--rate", type=float, default=500.0,
+                        help="strop rate limiteru (požadavků/s na host), aby neměřil jen zdvořilost")
+    parser.add_argument("--parse-repeat", type=int, default=200)
+    parser.add_argument("--output", default=None,
+                        help="JSON s výsledky (výchozí benchmarks/results/crawl-<čas>.json)")
+    args = parser.parse_args()
+
+    started = datetime.now()
+    output = Path(args.output) if args.output else ROOT / "results" / f"crawl-{started:%Y%m%d-%H%M%S}.json"
+
+    parse_results = bench_parsers(args.parse_repeat)
+    for r in parse_results:
+        print(f"parse {r['file']:<28} {r['backend']:<5} {r['parse_us_per_page']:8.0f} µs/stránku")
+
+    ctx = multiprocessing.get_context("spawn")
+    crawl_results = []
+    with MockSite(pages=args.pages, links_per_page=args.links_per_page, latency=args.latency,
+                  jitter=args.jitter, error_rate=args.error_rate) as site:
+        for source in args.sources:
+            page_urls = list(site.page_urls(source))
+            for workers in args.workers:
+                queue = ctx.Queue()
+                proc = ctx.Process(target=run_scenario,
+                                   args=(source, page_urls, workers, args.parse_processes, args.rate, queue))
+                proc.start()
+                proc.join()
+                if proc.exitcode != 0:
+                    print(f"Scénář {source} max_workers={workers} selhal (exit {proc.exitcode}).")
+                    return 1
+                result = queue.get()
+                crawl_results.append(result)
+                print(f"crawl {source:<8} max_workers={workers:<3} {result['pages_per_sec']:7.1f} stránek/s  "
+                      f"parse {result['parse_us_per_page']:6.0f} µs  fetch p95 {result['fetch_ms_p95']:6.1f} ms  "
+                      f"RSS {result['rss_peak_mb']:6.1f} MB (+ pool {result['rss_peak_parse_workers_mb']:.1f} MB)")
+        server_stats = {"requests": site.requests, "errors": site.errors}
+
+    report = {
+        "meta": {
+            "started": started.isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "html_backend": html_parsers.DEFAULT_BACKEND,
+            "args": vars(args),
+            "server": server_stats,
+        },
+        "parse": parse_results,
+        "crawl": crawl_results,
+    }
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"Výsledky uloženy do '{output}'.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
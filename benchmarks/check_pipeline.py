@@ -0,0 +1,117 @@
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+sys.path.insert(0, str(ROOT.parent))
+sys.path.insert(0, str(ROOT.parent / "scrapers"))
+
+import aaaauto_scraper
+import http_client
+import metrics
+import run_pipeline
+import sauto_scraper
+from mock_server import MockSite
+
+# Chyby, které by souběžné crawly na sdílených SQLite souborech hlásily
+ERROR_COUNTERS = ("index_errors_total", "raw_cache_errors_total")
+
+
+def redirect_to(site):
+    """
+    Přesměruje stahování obou scraperů z ostrých webů na mock server (bez rate limiteru).
+    """
+    session = http_client.create_session(pool_size=40)
+    real = {
+        "https://www.sauto.cz/inzerce/osobni": site.listing_url("sauto"),
+        "https://www.aaaauto.cz/ojete-vozy/": site.listing_url("aaaauto"),
+    }
+
+    def fetch(url, headers=None, budget=None):
+        for prefix, target in real.items():
+            if url.startswith(prefix):
+                url = target + url[len(prefix):]
+        return http_client.fetch(session, url, headers=headers, timeout=10, budget=budget)
+
+    sauto_scraper.fetch_response = fetch
+    aaaauto_scraper.fetch_response = lambda url, session, headers=None, budget=None: fetch(url, headers, budget)
+
+
+def _counter(snapshot, name):
+    counters, _ = snapshot
+    return sum(value for (key, _), value in counters.items() if key == name)
+
+
+def run_once(workdir, timeout):
+    """
+    Jeden běh run_pipeline s oběma crawly najednou, sdíleným index_path a raw_cache_path.
+    Vrací (počet vyčištěných řádků, chyby indexu/cache); při zaseknutí vyhodí TimeoutError.
+    """
+    metrics.registry.drain()
+    outcome = {}
+
+    def target():
+        try:
+            outcome["rows"] = run_pipeline.run_pipeline(
+                output=os.path.join(workdir, "clean.csv"),
+                sauto_output=os.path.join(workdir, "sauto.csv"),
+                aaaauto_output=os.path.join(workdir, "aaaauto.csv"),
+                sauto_min=10 ** 6, aaaauto_min=10 ** 6, max_pages=100, parse_processes=2,
+                index_path=os.path.join(workdir, "crawl_index.sqlite"),
+                raw_cache_path=os.path.join(workdir, "raw_cache"))
+        except BaseException as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    if thread.is_alive():
+        raise TimeoutError(f"run_pipeline nedoběhl do {timeout} s")
+    if "error" in outcome:
+        raise outcome["error"]
+    snapshot = metrics.registry.drain()
+    return outcome["rows"], {name: _counter(snapshot, name) for name in ERROR_COUNTERS}
+
+
+def index_rows(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM seen").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Souběžný crawl Sauto i AAA Auto přes run_pipeline proti mock serveru")
+    parser.add_argument("--runs", type=int, default=3, help="kolikrát pipeline zopakovat (s plným indexem)")
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    args = parser.parse_args()
+
+    failures = []
+    with MockSite(pages=args.pages, links_per_page=20) as site, tempfile.TemporaryDirectory() as workdir:
+        redirect_to(site)
+        expected = args.pages * 20
+        for run in range(1, args.runs + 1):
+            rows, errors = run_once(workdir, args.timeout)
+            counts = {source: index_rows(run_pipeline.source_path(os.path.join(workdir, "crawl_index.sqlite"), source))
+                      for source in ("sauto", "aaaauto")}
+            print(f"běh {run}: {rows} řádků, index {counts}, chyby {errors}")
+            if any(errors.values()):
+                failures.append(f"běh {run}: chyby indexu/cache {errors}")
+            if any(count != expected for count in counts.values()):
+                failures.append(f"běh {run}: index má {counts}, čekáno {expected} na zdroj")
+    for failure in failures:
+        print(failure)
+    if failures:
+        return 1
+    print("OK – oba crawly běží souběžně bez zamčené databáze.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
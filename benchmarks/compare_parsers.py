@@ -0,0 +1,63 @@
+import json
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+sys.path.insert(0, str(ROOT.parent / "scrapers"))
+
+import aaaauto_scraper
+import html_parsers
+import sauto_scraper
+
+FIXTURES = ROOT / "fixtures"
+
+PARSERS = {
+    ("sauto", "listing"): lambda url, html, backend: (sorted(sauto_scraper.extract_listing_links(html, backend)),
+                                                      sauto_scraper.extract_listing_cards(html, backend)),
+    ("sauto", "detail"): sauto_scraper.parse_sauto_html,
+    ("aaaauto", "listing"): lambda url, html, backend: sorted(aaaauto_scraper.extract_listing_links(html, backend)),
+    ("aaaauto", "detail"): aaaauto_scraper.parse_aaaauto_html,
+}
+
+
+def load_fixtures():
+    """
+    Vrátí seznam (záznam z manifestu, HTML) pro všechny uložené stránky.
+    """
+    manifest = json.loads((FIXTURES / "manifest.json").read_text(encoding="utf-8"))
+    return [(entry, (FIXTURES / entry["file"]).read_text(encoding="utf-8")) for entry in manifest]
+
+
+def compare_backends(backends=html_parsers.BACKENDS):
+    """
+    Naparsuje každou fixture stránku všemi backendy a vrátí seznam rozdílů.
+    Prázdný seznam znamená, že backendy dávají identické záznamy.
+    """
+    mismatches = []
+    for entry, html in load_fixtures():
+        parse = PARSERS[(entry["source"], entry["kind"])]
+        results = {backend: parse(entry["url"], html, backend) for backend in backends}
+        reference = results[backends[0]]
+        for backend, result in results.items():
+            if result != reference:
+                mismatches.append((entry["file"], backends[0], reference, backend, result))
+    return mismatches
+
+
+def main():
+    if html_parsers.lxml is None:
+        print("lxml není nainstalované – není co porovnávat.")
+        return 1
+    mismatches = compare_backends()
+    for file, ref_backend, reference, backend, result in mismatches:
+        print(f"{file}: {ref_backend} != {backend}")
+        print(f"  {ref_backend}: {reference}")
+        print(f"  {backend}: {result}")
+    if mismatches:
+        return 1
+    print(f"OK – backendy {', '.join(html_parsers.BACKENDS)} dávají identické záznamy.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,168 @@
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+SAUTO_LINK = ('<li class="c-item"><a class="sds-surface sds-surface--clickable sds-surface--00 c-item__link" '
+              'href="{url}"><h3 class="c-item__name">Inzerát {id}</h3></a></li>')
+AAAAUTO_LINK = '<div class="card"><a href="{url}">Inzerát {id}</a></div>'
+
+
+def load_details():
+    """
+    Načte uložené detaily inzerátů z fixtures, seskupené podle zdroje.
+    """
+    manifest = json.loads((FIXTURES / "manifest.json").read_text(encoding="utf-8"))
+    details = {}
+    for entry in manifest:
+        if entry["kind"] == "detail":
+            details.setdefault(entry["source"], []).append((FIXTURES / entry["file"]).read_bytes())
+    return details
+
+
+class MockSite:
+    """
+    Lokální náhrada za Sauto a AAA Auto pro offline benchmarky.
+
+    Listing stránky 1..pages obsahují links_per_page odkazů na unikátní detaily,
+    další stránky jsou prázdné (crawl tam skončí). Detaily se vrací z uložených
+    fixtures. Každá odpověď se zdrží o latency (± jitter) sekund a s pravděpodobností
+    error_rate vrátí 503, takže se projeví i retry a adaptivní rate limiter.
+
+    URL:  /sauto/inzerce/osobni[?page=N], /sauto/osobni/detail/<id>,
+          /aaaauto/ojete-vozy/[?page=N],  /aaaauto/vuz/car.html?id=<id>
+    """
+
+    def __init__(self, pages=5, links_per_page=20, latency=0.0, jitter=0.0,
+                 error_rate=0.0, seed=42, host="127.0.0.1", port=0):
+        self.pages = pages
+        self.links_per_page = links_per_page
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.details = load_details()
+        self.requests = 0
+        self.errors = 0
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def listing_url(self, source):
+        return f"{self.base_url}/sauto/inzerce/osobni" if source == "sauto" else f"{self.base_url}/aaaauto/ojete-vozy/"
+
+    def page_urls(self, source, max_pages=None):
+        """
+        URL listing stránek pro daný zdroj (o jednu navíc – prázdná stránka ukončí crawl).
+        """
+        base = self.listing_url(source)
+        for page in range(1, (max_pages or self.pages + 1) + 1):
+            yield base if page == 1 else f"{base}?page={page}"
+
+    def listing(self, source, page):
+        if page > self.pages:
+            links = []
+        else:
+            first = (page - 1) * self.links_per_page
+            ids = range(first, first + self.links_per_page)
+            if source == "sauto":
+                links = [SAUTO_LINK.format(url=f"{self.base_url}/sauto/osobni/detail/{i}", id=i) for i in ids]
+            else:
+                links = [AAAAUTO_LINK.format(url=f"{self.base_url}/aaaauto/vuz/car.html?id={i}", id=i) for i in ids]
+        return ("<html><body><ul>" + "".join(links) + "</ul></body></html>").encode("utf-8")
+
+    def respond(self, path, query):
+        """
+        Vrátí (status, tělo) pro požadovanou cestu.
+        """
+        with self.lock:
+            self.requests += 1
+            delay = max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+            failed = self.random.random() < self.error_rate
+            if failed:
+                self.errors += 1
+        if delay:
+            time.sleep(delay)
+        if failed:
+            return 503, b"Service Unavailable"
+        source = path.strip("/").split("/", 1)[0]
+        if source not in self.details:
+            return 404, b"Not Found"
+        if "/detail/" in path or path.endswith("car.html"):
+            item_id = int(query.get("id", [path.rsplit("/", 1)[-1]])[0])
+            details = self.details[source]
+            return 200, details[item_id % len(details)]
+        return 200, self.listing(source, int(query.get("page", ["1"])[0]))
+
+    def _handler(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                status, body = site.respond(parts.path, parse_qs(parts.query))
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lokální mock server Sauto/AAA Auto pro benchmarky")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--pages", type=int, default=5)
+    parser.add_argument("--links-per-page", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05, help="zpoždění odpovědi v sekundách")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="podíl odpovědí 503 (0–1)")
+    args = parser.parse_args()
+
+    site = MockSite(pages=args.pages, links_per_page=args.links_per_page, latency=args.latency,
+                    jitter=args.jitter, error_rate=args.error_rate, port=args.port)
+    print(f"Mock server běží na {site.base_url} (Sauto: {site.listing_url('sauto')}, "
+          f"AAA Auto: {site.listing_url('aaaauto')})")
+    try:
+        site.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        site.server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,47 +1,116 @@
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+
+import numpy as np
 import pandas as pd
 
+from analytics import build_database
 
-def normalize_transmission(val):
-    """
-    Sjednotí převodovku na "Automat", "Manuál" nebo "Nezjištěno".
-    """
-    if pd.isna(val):
-        return "Nezjištěno"
-    val_lower = str(val).lower().strip()
-    if "automat" in val_lower:
-        return "Automat"
-    elif "manuál" in val_lower or "manuální" in val_lower or "stupňů" in val_lower:
-        return "Manuál"
-    return "Nezjištěno"
+# Normalizační tabulky sdílíme se scrapery (adresář scrapers/)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "scrapers"))
+
+from normalization import normalize_fuel, normalize_transmission
+
+NUMERIC_COLS = ["Rok", "Najeté km", "Cena", "Výkon (kW)"]
+MUST_HAVE_COLS = ["Značka", "Model", "Rok", "Najeté km", "Cena", "Palivo", "Převodovka", "Výkon (kW)"]
 
 
-def normalize_fuel(val):
+def read_table(path, columns=None):
     """
-    Sjednotí palivo na základní kategorie.
+    Načte výstup scraperu – CSV, nebo Parquet dataset (".parquet"), kde se čtou
+    jen požadované sloupce.
     """
-    if pd.isna(val):
-        return "Nezjištěno"
-    val_lower = str(val).lower().strip()
-    if "benz" in val_lower:
-        return "Benzín"
-    elif "naft" in val_lower or "diesel" in val_lower:
-        return "Nafta"
-    elif "hybrid" in val_lower:
-        return "Hybrid"
-    elif "elekt" in val_lower:
-        return "Elektro"
-    return "Nezjištěno"
+    if str(path).endswith(".parquet"):
+        return pd.read_parquet(path, columns=columns)
+    return pd.read_csv(path, usecols=columns)
 
 
-def load_and_merge_data(file1, file2):
-    df1 = pd.read_csv(file1)
-    df2 = pd.read_csv(file2)
+def load_and_merge_data(file1, file2, columns=None):
+    df1 = read_table(file1, columns)
+    df2 = read_table(file2, columns)
     df_all = pd.concat([df1, df2], ignore_index=True)
     print("Původní počet záznamů:", len(df_all))
     return df_all
 
 
+def normalize_column(series, normalize):
+    """
+    Aplikuje normalize jen na unikátní hodnoty sloupce a výsledek rozprostře
+    zpět na všechny řádky (místo volání funkce pro každý řádek).
+    """
+    codes, uniques = pd.factorize(series)
+    # Kód -1 (chybějící hodnota) ukáže na poslední prvek tabulky
+    table = np.array([normalize(u) for u in uniques] + [normalize(np.nan)], dtype=object)
+    return pd.Series(table[codes], index=series.index, name=series.name)
+
+
+def sentinel_mask(df, cols, sentinel="Nezjištěno"):
+    """
+    Vrátí masku řádků, kde některý ze sloupců cols obsahuje sentinel.
+    Počítá se po sloupcích; numerické sloupce sentinel obsahovat nemohou.
+    """
+    mask = np.zeros(len(df), dtype=bool)
+    for col in cols:
+        if pd.api.types.is_numeric_dtype(df[col]):
+            continue
+        mask |= df[col].astype(str).str.contains(sentinel, regex=False).to_numpy()
+    return mask
+
+
+def normalize_and_coerce(df):
+    """
+    Normalizace převodovky a paliva, převod čísel a odstranění řádků
+    s chybějícími klíčovými hodnotami (in-place).
+    """
+    # Normalizace převodovky a paliva – jen přes unikátní hodnoty
+    if "Převodovka" in df.columns:
+        df["Převodovka"] = normalize_column(df["Převodovka"], normalize_transmission)
+    if "Palivo" in df.columns:
+        df["Palivo"] = normalize_column(df["Palivo"], normalize_fuel)
+
+    # Převod sloupců na numerické hodnoty – scrapery už ukládají typované inty,
+    # převádí se jen textové sloupce (např. výstupy starších verzí)
+    for col in NUMERIC_COLS:
+        if col in df.columns and not pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+
+    # Odstranění řádků s chybějícími hodnotami v klíčových sloupcích
+    existing_cols = [c for c in MUST_HAVE_COLS if c in df.columns]
+    df.dropna(subset=existing_cols, inplace=True)
+
+
+def as_integers(series):
+    """
+    Číselný sloupec jako nullable Int64 – rok, nájezd, cena i výkon jsou celá čísla
+    a ve výstupu nesmí dostat ".0" jen proto, že pandas v dávce odhadl float.
+    """
+    return pd.to_numeric(series, errors="coerce").round().astype("Int64")
+
+
 def clean_data(df):
+    normalize_and_coerce(df)
+
+    # Odstranění duplicit – podle všech klíčových sloupců
+    df.drop_duplicates(subset=MUST_HAVE_COLS, keep="first", inplace=True)
+
+    # Odstranění řádků, kde některý z klíčových atributů obsahuje "Nezjištěno"
+    df = df[~sentinel_mask(df, MUST_HAVE_COLS)].copy()
+    for col in NUMERIC_COLS:
+        df[col] = as_integers(df[col])
+
+    print("Po čištění a filtrování počet záznamů:", len(df))
+    return df
+
+
+def clean_data_rowwise(df):
+    """
+    Původní řádková implementace clean_data – ponechaná jako reference
+    pro ověření shodného výstupu a pro benchmark (benchmarks/bench_clean_data.py).
+    """
     # Normalizace převodovky a paliva
     if "Převodovka" in df.columns:
         df["Převodovka"] = df["Převodovka"].apply(normalize_transmission)
@@ -69,7 +138,181 @@ def clean_data(df):
     return df
 
 
+class RowKeySet:
+    """
+    Množina již viděných řádků pro deduplikaci napříč chunky.
+
+    Místo celých řádků drží jen 64bitový hash klíčových sloupců (kolize jsou
+    při milionech řádků zanedbatelné). Dokud je klíčů méně než max_memory_keys,
+    drží je v paměti; pak se přelijí do dočasné SQLite tabulky na disku.
+    """
+
+    def __init__(self, max_memory_keys=20_000_000):
+        self.max_memory_keys = max_memory_keys
+        self.keys = set()
+        self.conn = None
+        self.db_path = None
+
+    def _spill(self):
+        fd, self.db_path = tempfile.mkstemp(suffix=".sqlite", prefix="row_keys_")
+        os.close(fd)
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.execute("CREATE TABLE keys (k INTEGER PRIMARY KEY)")
+        self.conn.executemany("INSERT INTO keys VALUES (?)", ((k,) for k in self.keys))
+        self.conn.commit()
+        self.keys = None
+        print("Množina klíčů pro deduplikaci přelita na disk:", self.db_path)
+
+    def first_seen(self, hashes):
+        """
+        Vrátí masku řádků, jejichž klíč ještě nebyl vidět (první výskyt vyhraje,
+        i v rámci téhož chunku), a klíče si zapamatuje.
+        """
+        # Znaménkový int64 kvůli SQLite; první výskyt v chunku
+        hashes = hashes.astype(np.int64)
+        mask = ~pd.Index(hashes).duplicated(keep="first")
+        candidates = hashes[mask].tolist()
+        if self.conn is None:
+            seen = {k for k in candidates if k in self.keys}
+        else:
+            seen = set()
+            for i in range(0, len(candidates), 500):
+                batch = candidates[i:i + 500]
+                placeholders = ",".join("?" * len(batch))
+                seen.update(r[0] for r in self.conn.execute(
+                    f"SELECT k FROM keys WHERE k IN ({placeholders})", batch))
+        new_keys = [k for k in candidates if k not in seen]
+        if self.conn is None:
+            self.keys.update(new_keys)
+            if len(self.keys) > self.max_memory_keys:
+                self._spill()
+        else:
+            self.conn.executemany("INSERT INTO keys VALUES (?)", ((k,) for k in new_keys))
+            self.conn.commit()
+        mask[mask] = [k not in seen for k in candidates]
+        return mask
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            os.remove(self.db_path)
+
+
+def row_hashes(df, cols=MUST_HAVE_COLS):
+    """
+    64bitové hashe klíčových sloupců, nezávislé na tom, jaký dtype pandas
+    v daném chunku odhadl (2014 vs 2014.0, object vs str).
+    """
+    keyed = pd.DataFrame({
+        col: as_integers(df[col]) if col in NUMERIC_COLS else df[col].astype(str).astype(object)
+        for col in cols
+    })
+    return pd.util.hash_pandas_object(keyed, index=False).to_numpy()
+
+
+def iter_chunks(path, chunksize):
+    """
+    Čte výstup scraperu po chuncích – CSV přes read_csv(chunksize),
+    Parquet (soubor i dataset adresář) po dávkách pyarrow.
+    """
+    if str(path).endswith(".parquet"):
+        import pyarrow.dataset as ds
+        for batch in ds.dataset(path, format="parquet").to_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunksize, dtype={"Značka": str, "Model": str})
+
+
+class StreamingCleaner:
+    """
+    Čištění po dávkách s průběžným zápisem do output (CSV).
+
+    Každá dávka (DataFrame) se normalizuje a převede na čísla, duplicity se
+    hlídají napříč dávkami přes RowKeySet (první výskyt vyhraje, stejně jako
+    drop_duplicates). Používá ho clean_data_chunked i run_pipeline.py, kam
+    dávky přicházejí rovnou ze scraperů – add() je proto thread-safe.
+    """
+
+    def __init__(self, output, max_memory_keys=20_000_000):
+        self.output = output
+        if os.path.exists(output):
+            os.remove(output)
+        self.seen = RowKeySet(max_memory_keys=max_memory_keys)
+        self.lock = threading.Lock()
+        self.total_in = 0
+        self.total_out = 0
+
+    def add(self, chunk):
+        """
+        Vyčistí a připíše jednu dávku, vrací počet zapsaných řádků.
+        """
+        with self.lock:
+            self.total_in += len(chunk)
+            normalize_and_coerce(chunk)
+            chunk = chunk[~sentinel_mask(chunk, MUST_HAVE_COLS)]
+            chunk = chunk[self.seen.first_seen(row_hashes(chunk))]
+            # Čísla vždy jako Int64, aby všechny dávky měly stejný formát (bez ".0")
+            chunk = chunk.copy()
+            for col in NUMERIC_COLS:
+                chunk[col] = as_integers(chunk[col])
+            new_file = not os.path.exists(self.output)
+            chunk.to_csv(self.output, mode="a", header=new_file, index=False,
+                         encoding="utf-8-sig" if new_file else "utf-8")
+            self.total_out += len(chunk)
+            return len(chunk)
+
+    def close(self):
+        self.seen.close()
+        print("Původní počet záznamů:", self.total_in)
+        print("Po čištění a filtrování počet záznamů:", self.total_out)
+        return self.total_out
+
+
+def clean_data_chunked(inputs, output, chunksize=100_000, max_memory_keys=20_000_000):
+    """
+    Out-of-core varianta clean_data pro data větší než RAM.
+
+    Vstupy čte po chuncích a čistí je přes StreamingCleaner, výsledek
+    průběžně připisuje do output (CSV). Vrací počet zapsaných řádků.
+    """
+    cleaner = StreamingCleaner(output, max_memory_keys=max_memory_keys)
+    try:
+        for path in inputs:
+            for chunk in iter_chunks(path, chunksize):
+                cleaner.add(chunk)
+    finally:
+        total_out = cleaner.close()
+    return total_out
+
+
+def report_unknown_variants():
+    """
+    Vypíše surové hodnoty paliva a převodovky, které normalizace nezná –
+    takové řádky se zahazují jako "Nezjištěno".
+    """
+    for name, table in (("Palivo", normalize_fuel), ("Převodovka", normalize_transmission)):
+        unknown = table.unknown_variants()
+        if unknown:
+            print(f"Neznámé varianty ({name}):", ", ".join(map(str, unknown)))
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Sloučení a vyčištění dat ze scraperů")
+    parser.add_argument("--chunksize", type=int, default=None,
+                        help="zpracovat vstupy po chuncích této velikosti (pro data větší než RAM)")
+    parser.add_argument("--db", default="auta_cleaned.sqlite",
+                        help="SQLite databáze pro dotazy (analytics.py), prázdné = nevytvářet")
+    args = parser.parse_args()
+
+    if args.chunksize:
+        clean_data_chunked(["auta_sauto.csv", "auta_aaaauto.csv"], "auta_cleaned.csv",
+                           chunksize=args.chunksize)
+        print("Hotovo! Vyčištěná data jsou uložena v 'auta_cleaned.csv'.")
+        report_unknown_variants()
+        if args.db:
+            build_database("auta_cleaned.csv", args.db, chunksize=args.chunksize)
+        return
+
     # Načtení a sloučení dat – uprav názvy souborů podle tvých CSV
     df_all = load_and_merge_data("auta_sauto.csv", "auta_aaaauto.csv")
 
@@ -79,6 +322,9 @@ def main():
     # Uložení vyčištěných dat do nového CSV (finální dataset obsahuje jen atributy)
     df_clean.to_csv("auta_cleaned.csv", index=False, encoding="utf-8-sig")
     print("Hotovo! Vyčištěná data jsou uložena v 'auta_cleaned.csv'.")
+    report_unknown_variants()
+    if args.db:
+        build_database("auta_cleaned.csv", args.db)
 
     # Pro kontrolu zobrazíme prvních pár řádků
     print(df_clean.head())
@@ -0,0 +1,178 @@
+import argparse
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Scrapery a sdílené moduly jsou v adresáři scrapers/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "scrapers"))
+
+import aaaauto_scraper
+import metrics
+import sauto_scraper
+from analytics import build_database
+from clean_data import StreamingCleaner, iter_chunks, report_unknown_variants
+from dedup_index import DedupIndex
+from record_store import RecordStore
+
+SAUTO_URL = "https://www.sauto.cz/inzerce/osobni"
+
+
+def source_path(path, source):
+    """
+    Vlastní soubor / adresář zdroje odvozený z path: "crawl_index.sqlite" ->
+    "crawl_index_sauto.sqlite", adresář "raw_cache" -> "raw_cache/sauto".
+    None zůstává None.
+    """
+    if not path:
+        return None
+    root, ext = os.path.splitext(path)
+    if not ext:
+        return os.path.join(path, source)
+    return f"{root}_{source}{ext}"
+
+
+class CleaningStream:
+    """
+    Sběrná dávka záznamů ze všech scraperů pro průběžné čištění.
+
+    Záznamy z obou crawlů (z různých vláken) se skládají do RecordStore
+    a po batch_size kusech se jako typovaný DataFrame předají StreamingCleaneru.
+    """
+
+    def __init__(self, cleaner, batch_size=500):
+        self.cleaner = cleaner
+        self.batch_size = batch_size
+        self.lock = threading.Lock()
+        self.buffer = RecordStore()
+
+    def add(self, record):
+        with self.lock:
+            self.buffer.append(record)
+            if len(self.buffer) < self.batch_size:
+                return
+            batch, self.buffer = self.buffer, RecordStore()
+        self.cleaner.add(batch.to_pandas())
+
+    def flush(self):
+        with self.lock:
+            batch, self.buffer = self.buffer, RecordStore()
+        if len(batch):
+            self.cleaner.add(batch.to_pandas())
+
+
+def run_pipeline(sources=("sauto", "aaaauto"), output="auta_cleaned.csv",
+                 sauto_output="auta_sauto.csv", aaaauto_output="auta_aaaauto.csv",
+                 sauto_min=10000, aaaauto_min=10000, max_pages=10000,
+                 sauto_workers=5, aaaauto_workers=20, parse_processes=None,
+                 index_path="crawl_index.sqlite", index_max_age=None, resume=False,
+                 batch_size=500, metrics_path=None, raw_cache_path=None, db_path=None,
+                 max_requests=None):
+    """
+    Spustí crawl Sauto i AAA Auto současně (každý ve vlastním vlákně s vlastním
+    počtem workerů a session) a jejich záznamy průběžně čistí do output.
+    Vyčištěná data jsou tak hotová, jakmile doběhne pomalejší z crawlů.
+
+    Surové výstupy scraperů (sauto_output, aaaauto_output) i checkpointy zůstávají
+    jako dřív; s resume=True se nejdřív znovu vyčistí už uložená surová data.
+    Oba crawly sdílí jeden DedupIndex, takže duplicity napříč zdroji se ani nestahují.
+    Index (index_path) i cache (raw_cache_path) má ale každý zdroj vlastní
+    (viz source_path) – dva crawly v různých vláknech by si jinak zamykaly
+    stejný SQLite soubor. S raw_cache_path se surové HTML detailů ukládá
+    pro scrapers/reparse_cache.py (raw_cache/sauto, raw_cache/aaaauto).
+    Inzeráty ověřené v indexu před méně než index_max_age sekundami se nestahují.
+    S db_path se vyčištěná data nakonec nahrají do SQLite pro dotazy (analytics.py).
+    max_requests omezuje počet HTTP požadavků každého z crawlů.
+    Vrací počet řádků ve vyčištěném výstupu.
+    """
+    cleaner = StreamingCleaner(output)
+    stream = CleaningStream(cleaner, batch_size=batch_size)
+    dedup = DedupIndex()
+
+    if resume:
+        for path in (sauto_output, aaaauto_output):
+            if os.path.exists(path):
+                for chunk in iter_chunks(path, batch_size * 20):
+                    cleaner.add(chunk)
+
+    jobs = {}
+    with ThreadPoolExecutor(max_workers=len(sources)) as executor:
+        if "sauto" in sources:
+            jobs["sauto"] = executor.submit(
+                sauto_scraper.scrape_sauto_min_inzeraty, SAUTO_URL,
+                min_inzeraty=sauto_min, max_pages=max_pages, max_workers=sauto_workers,
+                parse_processes=parse_processes, index_path=source_path(index_path, "sauto"),
+                index_max_age=index_max_age,
+                output=sauto_output, resume=resume, dedup=dedup, on_record=stream.add,
+                raw_cache_path=source_path(raw_cache_path, "sauto"),
+                max_requests=max_requests)
+        if "aaaauto" in sources:
+            jobs["aaaauto"] = executor.submit(
+                aaaauto_scraper.scrape_aaaauto,
+                min_inzeraty=aaaauto_min, max_pages=max_pages, max_workers=aaaauto_workers,
+                parse_processes=parse_processes, index_path=source_path(index_path, "aaaauto"),
+                index_max_age=index_max_age,
+                output=aaaauto_output, resume=resume, dedup=dedup, on_record=stream.add,
+                raw_cache_path=source_path(raw_cache_path, "aaaauto"), max_requests=max_requests)
+        try:
+            for source, job in jobs.items():
+                job.result()
+                print(f"Crawl {source} dokončen.")
+        finally:
+            stream.flush()
+            total = cleaner.close()
+            if metrics_path:
+                metrics.registry.export(metrics_path)
+
+    print(f"Hotovo! Vyčištěná data jsou uložena v '{output}'.")
+    report_unknown_variants()
+    if db_path:
+        build_database(output, db_path)
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Crawl Sauto a AAA Auto najednou s průběžným čištěním")
+    parser.add_argument("--sources", nargs="+", default=["sauto", "aaaauto"], choices=["sauto", "aaaauto"])
+    parser.add_argument("--output", default="auta_cleaned.csv", help="vyčištěný výstup")
+    parser.add_argument("--sauto-output", default="auta_sauto.csv")
+    parser.add_argument("--aaaauto-output", default="auta_aaaauto.csv")
+    parser.add_argument("--sauto-min", type=int, default=10000, help="počet inzerátů ze Sauto")
+    parser.add_argument("--aaaauto-min", type=int, default=10000, help="počet inzerátů z AAA Auto")
+    parser.add_argument("--max-pages", type=int, default=10000)
+    parser.add_argument("--sauto-workers", type=int, default=5)
+    parser.add_argument("--aaaauto-workers", type=int, default=20)
+    parser.add_argument("--parse-processes", type=int, default=None,
+                        help="procesy parsovacího poolu každého crawlu (0 = vlákna)")
+    parser.add_argument("--index", default="crawl_index.sqlite",
+                        help="SQLite index pro inkrementální crawl, každý zdroj má vlastní "
+                             "(crawl_index_sauto.sqlite…; prázdné = vypnuto)")
+    parser.add_argument("--index-max-age", type=float, default=None, metavar="HODINY",
+                        help="inzeráty ověřené v indexu před méně hodinami vůbec nestahovat")
+    parser.add_argument("--resume", action="store_true",
+                        help="pokračovat v přerušených crawlech podle checkpointů")
+    parser.add_argument("--metrics", default="metrics_pipeline.json",
+                        help="kam uložit metriky obou crawlů (.json nebo .prom)")
+    parser.add_argument("--raw-cache", default=None,
+                        help="adresář pro komprimované HTML detailů, po podadresáři na zdroj "
+                             "(pro pozdější přeparsování)")
+    parser.add_argument("--db", default="auta_cleaned.sqlite",
+                        help="SQLite databáze pro dotazy (analytics.py), prázdné = nevytvářet")
+    parser.add_argument("--max-requests", type=int, default=None,
+                        help="nejvýš tolik HTTP požadavků (včetně opakování) na každý crawl; nejdřív se projde "
+                             "listing (nejvýš polovina rozpočtu), pak detaily – nové a změněné napřed")
+    args = parser.parse_args()
+
+    run_pipeline(sources=args.sources, output=args.output,
+                 sauto_output=args.sauto_output, aaaauto_output=args.aaaauto_output,
+                 sauto_min=args.sauto_min, aaaauto_min=args.aaaauto_min, max_pages=args.max_pages,
+                 sauto_workers=args.sauto_workers, aaaauto_workers=args.aaaauto_workers,
+                 parse_processes=args.parse_processes, index_path=args.index or None,
+                 index_max_age=args.index_max_age * 3600 if args.index_max_age else None,
+                 resume=args.resume, metrics_path=args.metrics,
+                 raw_cache_path=args.raw_cache, db_path=args.db or None,
+                 max_requests=args.max_requests)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,56 +1,87 @@
-import requests
-from bs4 import BeautifulSoup
-import time
+import argparse
 import pandas as pd
-import concurrent.futures
+
+import html_parsers
+import http_client
+import metrics
+from checkpoint import Checkpoint, checkpoint_path
+from crawl_engine import CrawlEngine
+from dedup_index import DedupIndex
+from field_parsers import parse_km, parse_power, parse_price, parse_year
+from normalization import normalize_transmission
+from rate_limiter import AdaptiveRateLimiter
+from raw_cache import RawCache
+from schema import COLUMNS
+from seen_index import SeenIndex
+from sink import open_sink, read_output
 
 pd.set_option('display.max_colwidth', None)
 
 # Vytvoříme persistentní session s hlavičkou
-session = requests.Session()
-session.headers.update({
+session = http_client.create_session(pool_size=20, headers={
     "User-Agent": "Mozilla/5.0"
 })
 
-def fetch_url(url, session, max_retries=3, timeout=30):
+# Tempo požadavků na aaaauto.cz – sdílené listingem i detaily, přizpůsobuje se odezvě webu
+limiter = AdaptiveRateLimiter()
+
+def fetch_url(url, session, max_retries=3, timeout=30, headers=None, budget=None):
     """
     Načte URL s opakovanými pokusy, aby se minimalizovaly chyby s timeoutem.
-    Používá persistentní session.
+    Používá persistentní session, headers jsou hlavičky navíc (např. If-None-Match).
+    Tempo hlídá sdílený limiter, opakování řeší http_client.fetch (backoff, Retry-After).
+    """
+    return http_client.fetch(session, url, headers=headers, timeout=timeout,
+                             max_retries=max_retries, limiter=limiter, budget=budget)
+
+def fetch_response(url, session, headers=None, budget=None):
+    """
+    Vrátí celou odpověď (None při neúspěchu) – CrawlEngine z ní bere surové bytes
+    i hlavičky ETag / Last-Modified.
     """
-    for attempt in range(1, max_retries + 1):
-        try:
-            response = session.get(url, timeout=timeout)
-            response.raise_for_status()
-            return response
-        except Exception as e:
-            print(f"Chyba při načítání {url} (pokus {attempt}/{max_retries}): {e}")
-            if attempt < max_retries:
-                time.sleep(1)  # kratší čekání pro rychlejší běh
-    return None
-
-def get_listing_links(listing_url, session):
+    return fetch_url(url, session, headers=headers, budget=budget)
+
+def extract_listing_links(html, backend=None):
     """
-    Načte stránku s inzeráty a najde všechny odkazy obsahující 'car.html'.
-    Odstraní duplicity.
+    Vytáhne z HTML listingu odkazy na detaily (obsahují 'car.html'), bez duplicit.
     """
-    response = fetch_url(listing_url, session)
-    if not response:
-        return []
-    soup = BeautifulSoup(response.text, "html.parser")
+    doc = html_parsers.parse(html, backend)
     links = []
-    for a in soup.find_all("a", href=True):
-        href = a["href"]
-        if "car.html" in href:
+    for a in doc.find_all("a"):
+        href = a.get("href")
+        if href and "car.html" in href:
             if not href.startswith("http"):
                 href = "https://www.aaaauto.cz" + href
             links.append(href)
     return list(set(links))
 
-def parse_aaaauto_detail(url, session):
+# Prvky detailu, které parser potřebuje (viz html_parsers.iter_matches)
+DETAIL_TARGETS = (
+    ("strong", "carCard__price-value carCard__price-value--big textGrey notranslate"),
+    ("li", None),
+    ("h1", "h2 mb5 notranslate"),
+    ("tr", None),
+)
+PRICE, PARAM, TITLE, ROW = range(len(DETAIL_TARGETS))
+
+# Parametry z <li>Popisek <strong>hodnota</strong></li>: (text popisku, pole, parser hodnoty).
+# Pořadí odpovídá prioritě – rozhoduje první popisek obsažený v textu položky.
+# Parser vrací None pro nepoužitelnou hodnotu, pole pak zůstane nezjištěné.
+LI_FIELDS = (
+    ("Značka", "Značka", str),
+    ("Model", "Model", str),
+    ("Rok", "Rok", parse_year),
+    ("Tachometr", "Najeté km", parse_km),
+    ("Palivo", "Palivo", str),
+    ("Převodovka", "Převodovka", normalize_transmission),
+    ("Výkon", "Výkon (kW)", parse_power),
+)
+
+def parse_aaaauto_html(url, html, backend=None):
     """
-    Načte detail inzerátu a extrahuje údaje:
-      - Značka, Model, Rok, Najeté km, Cena, Palivo, Převodovka, Výkon (kW).
-    Používá fetch_url se session.
+    Naparsuje již stažené HTML detailu inzerátu.
+    Pokud je html None (stažení selhalo), vrací záznam plný "Nezjištěno".
+    backend volí HTML parser (viz html_parsers.iter_matches).
     """
     details = {
         "URL": url,
@@ -64,142 +95,208 @@ def parse_aaaauto_detail(url, session):
         "Výkon (kW)": "Nezjištěno"
     }
 
-    response = fetch_url(url, session)
-    if not response:
+    if html is None:
         return details
 
-    soup = BeautifulSoup(response.text, "html.parser")
+    laps = metrics.registry.stopwatch("extract_seconds", source="aaaauto")
+    price_el = None
+    h1_el = None
+    tr_tags = []
+    # 1) Proudový průchod jen přes cenu, <li>, titulek a řádky tabulek – končí,
+    # jakmile je cena i všech 7 parametrů z <li> (pak fallback není potřeba)
+    for target, node in html_parsers.iter_matches(html, DETAIL_TARGETS, backend):
+        if target == PRICE:
+            if price_el is None:
+                price_el = node
+        elif target == PARAM:
+            # Data z <li> elementů – text jen u položek se <strong>, navigace a patička se přeskočí
+            strong = node.find("strong")
+            if not strong:
+                continue
+            text = node.text(" ")
+            for label, field, clean in LI_FIELDS:
+                if label in text:
+                    if details[field] == "Nezjištěno":
+                        value = clean(strong.text())
+                        if value is not None:
+                            details[field] = value
+                    break
+            if price_el is not None and all(details[field] != "Nezjištěno" for _, field, _ in LI_FIELDS):
+                break
+        elif target == TITLE:
+            if h1_el is None:
+                h1_el = node
+        elif target == ROW:
+            tr_tags.append(node)
+    laps.lap("scan")
 
-    # 1) Cena – hlavní prvek
-    price_el = soup.find("strong", class_="carCard__price-value carCard__price-value--big textGrey notranslate")
+    # 2) Cena – hlavní prvek
     if price_el:
-        price_text = price_el.get_text(" ", strip=True)
-        price_text = price_text.replace("Kč", "").replace("\xa0", "").replace(" ", "").strip()
-        details["Cena"] = price_text
-
-    # 2) Data z <li> elementů
-    li_tags = soup.find_all("li")
-    for li in li_tags:
-        text = li.get_text(" ", strip=True)
-        strong = li.find("strong")
-        if not strong:
-            continue
-        value = strong.get_text(strip=True)
-        if "Značka" in text:
-            details["Značka"] = value
-        elif "Model" in text:
-            details["Model"] = value
-        elif "Rok" in text:
-            details["Rok"] = value
-        elif "Tachometr" in text:
-            details["Najeté km"] = value.replace("km", "").strip()
-        elif "Palivo" in text:
-            details["Palivo"] = value
-        elif "Převodovka" in text:
-            if "automat" in value.lower():
-                details["Převodovka"] = "Automat"
-            else:
-                details["Převodovka"] = "Manuál"
-        elif "Výkon" in text:
-            details["Výkon (kW)"] = value.replace("kW", "").strip()
+        price = parse_price(price_el.text(" "))
+        if price is not None:
+            details["Cena"] = price
 
     # 3) Fallback – pokud některá data chybí, zkusíme další prvky
     if details["Značka"] == "Nezjištěno" or details["Model"] == "Nezjištěno" or details["Rok"] == "Nezjištěno":
-        h1_el = soup.find("h1", class_="h2 mb5 notranslate")
         if h1_el:
-            span_el = h1_el.find("span", class_="regular")
+            span_el = h1_el.find("span", "regular")
             if span_el:
-                span_text = span_el.get_text(" ", strip=True)
+                span_text = span_el.text(" ")
                 parts = span_text.split(",")
                 if len(parts) >= 2:
                     if details["Model"] == "Nezjištěno":
                         details["Model"] = parts[0].strip()
-                    if details["Rok"] == "Nezjištěno":
-                        details["Rok"] = parts[1].strip()
+                    year = parse_year(parts[1])
+                    if details["Rok"] == "Nezjištěno" and year is not None:
+                        details["Rok"] = year
                 elif len(parts) == 1 and details["Model"] == "Nezjištěno":
                     details["Model"] = parts[0].strip()
-                brand_text = h1_el.get_text(" ", strip=True).replace(span_text, "").strip()
+                brand_text = h1_el.text(" ").replace(span_text, "").strip()
                 if brand_text and details["Značka"] == "Nezjištěno":
                     details["Značka"] = brand_text
-        tr_tags = soup.find_all("tr")
         for tr in tr_tags:
             th = tr.find("th")
             td = tr.find("td")
             if th and td:
-                header = th.get_text(" ", strip=True)
-                value = td.get_text(" ", strip=True)
+                header = th.text(" ")
+                value = td.text(" ")
                 if "Rok uvedení" in header and details["Rok"] == "Nezjištěno":
-                    details["Rok"] = value
+                    year = parse_year(value)
+                    details["Rok"] = year if year is not None else "Nezjištěno"
                 elif "Tachometr" in header and details["Najeté km"] == "Nezjištěno":
-                    details["Najeté km"] = value.replace("km", "").strip()
+                    km = parse_km(value)
+                    details["Najeté km"] = km if km is not None else "Nezjištěno"
                 elif "Převodovka" in header and details["Převodovka"] == "Nezjištěno":
-                    if "automat" in value.lower():
-                        details["Převodovka"] = "Automat"
-                    else:
-                        details["Převodovka"] = "Manuál"
+                    details["Převodovka"] = normalize_transmission(value)
                 elif "Palivo" in header and details["Palivo"] == "Nezjištěno":
                     details["Palivo"] = value
+        laps.lap("fallback")
 
+    metrics.registry.count_missing(details, "aaaauto")
     if details["Převodovka"] == "Nezjištěno":
         details["Převodovka"] = "Manuál"
 
     return details
 
-def scrape_aaaauto_one_page(listing_url, session, max_workers=20):
-    print(f"Scrapování stránky: {listing_url}")
-    links = get_listing_links(listing_url, session)
-    print(f"Nalezeno {len(links)} odkazů...")
-    results = []
-
-    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-        future_to_url = {executor.submit(parse_aaaauto_detail, link, session): link for link in links}
-        for future in concurrent.futures.as_completed(future_to_url):
-            url = future_to_url[future]
-            try:
-                data = future.result()
-                results.append(data)
-                print("------------------------------------------------------------")
-                print(f"URL:        {data['URL']}")
-                print(f"Značka:     {data['Značka']}")
-                print(f"Model:      {data['Model']}")
-                print(f"Rok:        {data['Rok']}")
-                print(f"Najeté km:  {data['Najeté km']}")
-                print(f"Cena:       {data['Cena']} Kč")
-                print(f"Palivo:     {data['Palivo']}")
-                print(f"Převodovka: {data['Převodovka']}")
-                print(f"Výkon (kW): {data['Výkon (kW)']}")
-            except Exception as exc:
-                print(f"Chyba při zpracování detailu {url}: {exc}")
-    return results
-
-def scrape_aaaauto(min_inzeraty=50, max_pages=2, max_workers=20):
+def print_aaaauto_record(data):
+    """
+    Formátovaný výpis jednoho inzerátu.
+    """
+    print("------------------------------------------------------------")
+    print(f"URL:        {data['URL']}")
+    print(f"Značka:     {data['Značka']}")
+    print(f"Model:      {data['Model']}")
+    print(f"Rok:        {data['Rok']}")
+    print(f"Najeté km:  {data['Najeté km']}")
+    print(f"Cena:       {data['Cena']} Kč")
+    print(f"Palivo:     {data['Palivo']}")
+    print(f"Převodovka: {data['Převodovka']}")
+    print(f"Výkon (kW): {data['Výkon (kW)']}")
+
+def aaaauto_page_urls(max_pages, start_page=1):
+    """
+    Generuje URL stránek s inzeráty. Stránka jde v query (?page=N), aby ji
+    dostal server – dřívější "#!&page=N" se na server vůbec neposílal
+    a každá "stránka" vracela znovu první.
+    """
     base_url = "https://www.aaaauto.cz/ojete-vozy/"
-    all_results = []
-    page = 1
-    while page <= max_pages:
-        url = base_url if page == 1 else f"https://www.aaaauto.cz/ojete-vozy/#!&page={page}"
-        print(f"\nZpracovávám stránku {page}: {url}")
-        page_results = scrape_aaaauto_one_page(url, session, max_workers=max_workers)
-        if not page_results:
-            print("Žádné další inzeráty – končím.")
-            break
-        all_results.extend(page_results)
-        print(f"Celkem nasbíráno: {len(all_results)} inzerátů.\n")
-        if len(all_results) >= min_inzeraty:
-            print(f"Dosaženo {min_inzeraty} inzerátů – končím.")
-            break
-        page += 1
-        time.sleep(1)
-    df = pd.DataFrame(all_results)
-    # Odstraníme URL sloupec před uložením do CSV
-    if "URL" in df.columns:
-        df.drop(columns=["URL"], inplace=True)
-    df.to_csv("auta_aaaauto.csv", index=False, encoding="utf-8-sig")
-    print(f"\nUloženo {len(df)} záznamů do 'auta_aaaauto.csv'.")
-    return df
+    for page in range(start_page, max_pages + 1):
+        yield base_url if page == 1 else f"{base_url}?page={page}"
+
+def scrape_aaaauto(min_inzeraty=50, max_pages=2, max_workers=20,
+                   parse_processes=None, index_path=None, index_max_age=None,
+                   output="auta_aaaauto.csv", resume=False, buffer_size=500,
+                   verbose=False, metrics_path=None, prefetch_pages=2, dedup=None,
+                   on_record=None, raw_cache_path=None, max_requests=None,
+                   frontier_size=None):
+    """
+    Sbírá inzeráty přes CrawlEngine – listing a detaily běží jako jedna pipeline.
+    Detaily se parsují po dávkách v parse_processes procesech (None = počet jader).
+    S index_path je crawl inkrementální (viz SeenIndex).
+    Záznamy se průběžně zapisují do output (CSV nebo Parquet dataset pro ".parquet")
+    a ukládá se checkpoint (resume=True pokračuje).
+    Končí po nasbírání min_inzeraty nebo na prázdné stránce.
+    Každý inzerát se vypisuje jen s verbose=True, jinak průběžný postup;
+    s metrics_path se na konci uloží metriky crawlu.
+    prefetch_pages je počet listing stránek stahovaných dopředu.
+    Duplicity hlídá dedup (DedupIndex, lze sdílet se Sauto scraperem).
+    on_record(záznam) se volá pro každý uložený inzerát (např. pro průběžné čištění).
+    S raw_cache_path se surové HTML detailů ukládá do RawCache (viz reparse_cache.py).
+    max_requests omezuje počet HTTP požadavků na běh (listing nejvýš polovinou);
+    pořadí detailů určuje prioritní fronta (nové inzeráty napřed, viz frontier.Frontier)
+    s oknem frontier_size odkazů (s max_requests výchozí všechny).
+    """
+    progress = metrics.Progress("AAA Auto")
+    dedup = dedup if dedup is not None else DedupIndex()
+    forward = on_record
+
+    def on_record(data):
+        if verbose:
+            print_aaaauto_record(data)
+        progress.update()
+        if forward is not None:
+            forward(data)
+        return True
+
+    sink = open_sink(output, append=resume, buffer_size=buffer_size)
+    checkpoint = Checkpoint(checkpoint_path(output), sink, resume=resume)
+    remaining = min_inzeraty - sink.rows_written
+
+    http_client.mount_pool(session, max_workers)
+    index = SeenIndex(index_path, max_age=index_max_age) if index_path else None
+    raw_cache = RawCache(raw_cache_path) if raw_cache_path else None
+    engine = CrawlEngine(lambda url, headers=None, budget=None: fetch_response(url, session, headers, budget),
+                         max_workers=max_workers,
+                         parse_processes=parse_processes, index=index,
+                         prefetch_pages=prefetch_pages, dedup=dedup,
+                         raw_cache=raw_cache, max_requests=max_requests,
+                         frontier_size=frontier_size)
+    try:
+        if remaining > 0:
+            engine.run(
+                aaaauto_page_urls(max_pages, start_page=checkpoint.next_page),
+                extract_listing_links,
+                parse_aaaauto_html,
+                min_items=remaining,
+                on_record=on_record,
+                checkpoint=checkpoint,
+                first_page=checkpoint.next_page,
+                keep_results=False
+            )
+    finally:
+        checkpoint.close()
+        if index is not None:
+            index.close()
+        if raw_cache is not None:
+            raw_cache.close()
+        if metrics_path:
+            metrics.registry.export(metrics_path)
+    print(f"\nUloženo {sink.rows_written} záznamů do '{output}'.")
+    return read_output(output) if sink.rows_written else pd.DataFrame(columns=COLUMNS)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scraper inzerátů z AAA Auto")
+    parser.add_argument("--resume", action="store_true",
+                        help="pokračovat v přerušeném crawlu podle checkpointu")
+    parser.add_argument("--verbose", action="store_true",
+                        help="vypisovat každý nasbíraný inzerát")
+    parser.add_argument("--metrics", default="metrics_aaaauto.json",
+                        help="kam uložit metriky crawlu (.json nebo .prom)")
+    parser.add_argument("--raw-cache", default=None,
+                        help="adresář pro komprimované HTML detailů (pro reparse_cache.py)")
+    parser.add_argument("--max-requests", type=int, default=None,
+                        help="nejvýš tolik HTTP požadavků (včetně opakování) za běh; nejdřív se projde "
+                             "listing (nejvýš polovina rozpočtu), pak detaily – nové napřed")
+    parser.add_argument("--index-max-age", type=float, default=None, metavar="HODINY",
+                        help="inzeráty ověřené v indexu před méně hodinami vůbec nestahovat")
+    args = parser.parse_args()
+
     # Nastavte min_inzeraty a max_pages podle potřeby
-    df = scrape_aaaauto(min_inzeraty=10000, max_pages=10000, max_workers=20)
+    df = scrape_aaaauto(min_inzeraty=10000, max_pages=10000, max_workers=20,
+                        index_path="crawl_index.sqlite",
+                        index_max_age=args.index_max_age * 3600 if args.index_max_age else None,
+                        resume=args.resume,
+                        verbose=args.verbose, metrics_path=args.metrics,
+                        raw_cache_path=args.raw_cache, max_requests=args.max_requests)
     print("\nNáhled na prvních 5 řádků:")
     print(df.head())
@@ -0,0 +1,89 @@
+import json
+import os
+
+
+def checkpoint_path(output):
+    """
+    Cesta ke checkpointu pro daný výstupní soubor (auta_sauto.csv -> auta_sauto.checkpoint.json).
+    """
+    return os.path.splitext(output)[0] + ".checkpoint.json"
+
+
+class Checkpoint:
+    """
+    Stav dlouhého crawlu pro pokračování po pádu (--resume).
+
+    Drží číslo poslední zpracované stránky listingu, detaily z listingu, které
+    ještě nejsou hotové, a množinu hotových URL. Hotové záznamy jdou přes sink
+    průběžně na disk; checkpoint se ukládá vždy hned po zápisu sinku, takže
+    URL označené jako hotové už má svůj řádek ve výstupu.
+
+    Stav se ukládá do JSON souboru path (atomicky přes přejmenování),
+    hotová URL se jen připisují do path + ".done".
+    """
+
+    def __init__(self, path, sink, resume=False):
+        self.path = path
+        self.done_path = path + ".done"
+        self.sink = sink
+        self.page = 0
+        self.pending = {}
+        self.completed = set()
+        self._new_completed = []
+        if resume and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                state = json.load(f)
+            self.page = state["page"]
+            self.pending = dict.fromkeys(state["pending"])
+            if os.path.exists(self.done_path):
+                with open(self.done_path, encoding="utf-8") as f:
+                    self.completed = {line.rstrip("\n") for line in f if line.strip()}
+            print(f"Pokračuji od stránky {self.page + 1}, "
+                  f"rozpracováno {len(self.pending)} detailů, hotovo {len(self.completed)}.")
+        else:
+            for p in (path, self.done_path):
+                if os.path.exists(p):
+                    os.remove(p)
+
+    @property
+    def next_page(self):
+        return self.page + 1
+
+    def is_done(self, url):
+        return url in self.completed
+
+    def page_listed(self, page, links):
+        """
+        Zaznamená načtený listing – jeho odkazy jsou od teď rozpracované.
+        """
+        self.page = page
+        for link in links:
+            if link not in self.completed:
+                self.pending[link] = None
+        self.save()
+
+    def record_done(self, url, record=None):
+        """
+        Označí URL jako hotové; record (pokud není None) zapíše přes sink.
+        """
+        self.pending.pop(url, None)
+        self.completed.add(url)
+        self._new_completed.append(url)
+        if record is not None and self.sink.write(record):
+            self.save()
+
+    def save(self):
+        # Nejdřív data, pak stav – checkpoint nesmí předběhnout výstup
+        self.sink.flush()
+        if self._new_completed:
+            with open(self.done_path, "a", encoding="utf-8") as f:
+                f.writelines(url + "\n" for url in self._new_completed)
+            self._new_completed = []
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"page": self.page, "pending": list(self.pending)}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def close(self):
+        self.save()
+        self.sink.close()
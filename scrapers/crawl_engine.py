@@ -0,0 +1,456 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import metrics
+from dedup_index import is_empty_record
+from frontier import Frontier
+from seen_index import content_hash
+
+# True v procesech parsovacího poolu – jejich metriky se posílají zpět s každou dávkou
+_in_parse_worker = False
+
+
+def parse_batch(parse_detail, items):
+    """
+    Naparsuje dávku stažených stránek v procesu parsovacího poolu.
+    items je seznam (url, html), vrací seznam (url, záznam, chyba) a metriky
+    naměřené v parsovacím procesu (None, pokud se parsovalo v hlavním procesu).
+    """
+    parsed = []
+    for url, html in items:
+        start = time.perf_counter()
+        try:
+            parsed.append((url, parse_detail(url, html), None))
+        except Exception as e:
+            metrics.registry.inc("parse_errors_total")
+            parsed.append((url, None, str(e)))
+        metrics.registry.observe("parse_detail_seconds", time.perf_counter() - start)
+    snapshot = metrics.registry.drain() if _in_parse_worker else None
+    return parsed, snapshot
+
+
+def _init_parse_worker():
+    global _in_parse_worker
+    _in_parse_worker = True
+    # Kdyby proces zdědil metriky hlavního procesu, poslal by je zpět podruhé
+    metrics.registry.drain()
+
+
+def _parse_pool_context():
+    """
+    Kontext pro procesy parsovacího poolu: forkserver (nebo spawn), ne fork.
+    Fork za běhu fetch vláken by zkopíroval zámky (metriky, stdout) držené jiným
+    vláknem a potomek by na nich navždy visel.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+class CrawlEngine:
+    """
+    Asynchronní crawler sdílený Sauto i AAA Auto scraperem.
+
+    Listing a detaily běží jako jedna souvislá pipeline: producent prochází
+    stránky s inzeráty a plní omezenou frontu odkazů, workery z ní průběžně
+    berou detaily. Na stránku se tedy nečeká, dokud nedoběhnou všechny detaily.
+    Listing se navíc stahuje dopředu – až prefetch_pages stránek je rozpracováno,
+    než na ně producent dojde, takže workery na konci stránky nečekají na další.
+    Počet souběžných požadavků na jeden host omezuje semafor.
+
+    fetch(url, headers=None) je blokující funkce vracející requests Response
+    (None při chybě), spouští se ve vlákně, takže lze použít stávající session.
+    S max_requests dostane fetch navíc budget – funkci, kterou má zavolat před
+    každým HTTP pokusem včetně opakování (viz http_client.fetch).
+
+    S indexem (seen_index.SeenIndex) je crawl inkrementální: čerstvé inzeráty
+    se nestahují vůbec, ostatní se stahují podmíněně a při 304 nebo stejném
+    hashi obsahu se použije uložený záznam bez parsování.
+
+    S dedup (dedup_index.DedupIndex) se inzerát, který už byl zařazen, znovu
+    nestahuje, a záznam se stejným otiskem se zahodí – index lze sdílet mezi
+    enginy obou zdrojů.
+
+    Odkazy na detaily jdou přes prioritní frontier.Frontier: nové inzeráty a ty,
+    které se podle indexu nejspíš změnily, předbíhají ostatní (okno frontier_size
+    odkazů, 0 = neomezeně). max_requests omezuje počet HTTP požadavků na běh
+    (listing i detaily) – po vyčerpání se crawl ukončí, čerstvé záznamy z indexu
+    se ale dál vydávají, protože nic nestojí. S max_requests se nejdřív projde
+    listing (nejvýš listing_share rozpočtu) a detaily se začnou stahovat až potom,
+    seřazené přes všechny nalezené odkazy – jinak by známé inzeráty z první stránky
+    utratily rozpočet dřív, než se producent dostane k novým na dalších stránkách.
+    Opakuje-li se stránka listingu (server ignoruje stránkování), crawl končí.
+
+    S raw_cache (raw_cache.RawCache) se surové HTML každého staženého detailu
+    uloží komprimovaně na disk, aby šlo po opravě parseru přeparsovat bez crawlu
+    (viz reparse_cache.py).
+
+    Parsování detailů je od stahování oddělené: stažené stránky jdou do druhé
+    fronty a odtud po dávkách (parse_batch_size) do ProcessPoolExecutoru
+    s parse_processes procesy (None = počet jader). Parsování tak škáluje s jádry
+    místo jednoho jádra pod GIL. parse_processes=0 parsuje ve vláknech.
+
+    Chyba jednoho inzerátu (parsování, zápis do indexu nebo cache) se jen vypíše.
+    Spadne-li celá stage (např. on_record nebo sink vyhodí výjimku, rozbije se
+    pool procesů), ostatní se zruší a crawl tu chybu vyhodí – nezůstane viset.
+    """
+
+    def __init__(self, fetch, max_workers=10, per_host_limit=None,
+                 queue_size=None,
+                 parse_processes=None, parse_batch_size=8, index=None,
+                 prefetch_pages=2, dedup=None, raw_cache=None,
+                 frontier_size=None, max_requests=None, listing_share=0.5):
+        self.fetch = fetch
+        self.max_requests = max_requests
+        self.listing_share = listing_share
+        self.requests_made = 0
+        self._budget_lock = threading.Lock()
+        self.raw_cache = raw_cache
+        self.dedup = dedup
+        self.prefetch_pages = max(1, prefetch_pages)
+        self.index = index
+        self.max_workers = max_workers
+        self.per_host_limit = per_host_limit or max_workers
+        self.queue_size = queue_size or max_workers * 4
+        if frontier_size is None:
+            # S rozpočtem se řadí všechny odkazy z listingu, jinak jen okno
+            frontier_size = 0 if max_requests is not None else self.queue_size
+        self.frontier_size = frontier_size
+        self.parse_processes = os.cpu_count() if parse_processes is None else parse_processes
+        self.parse_batch_size = parse_batch_size
+        self._semaphores = {}
+
+    def _semaphore(self, url):
+        host = urlsplit(url).netloc
+        if host not in self._semaphores:
+            self._semaphores[host] = asyncio.Semaphore(self.per_host_limit)
+        return self._semaphores[host]
+
+    def _index_call(self, action, url, *args):
+        """
+        Zavolá zápis do indexu (touch / store); chyba SQLite (např. zamčená databáze)
+        se jen vypíše – inzerát se tím nezahodí a stage běží dál.
+        """
+        try:
+            action(url, *args)
+        except Exception as e:
+            metrics.registry.inc("index_errors_total")
+            print(f"Chyba indexu pro {url}: {e}")
+
+    def budget_exhausted(self):
+        return self.max_requests is not None and self.requests_made >= self.max_requests
+
+    def listing_budget_exhausted(self):
+        return self.max_requests is not None and self.requests_made >= self.max_requests * self.listing_share
+
+    def _charge(self, share=1.0):
+        """
+        Započítá jeden HTTP pokus do rozpočtu; False, pokud je vyčerpaný jeho podíl
+        share (listing smí čerpat jen listing_share). Volá se z vláken před každým pokusem.
+        """
+        with self._budget_lock:
+            if self.requests_made >= self.max_requests * share:
+                return False
+            self.requests_made += 1
+            return True
+
+    async def fetch_response(self, url, headers=None, listing=False):
+        if self.budget_exhausted() or (listing and self.listing_budget_exhausted()):
+            return None
+        async with self._semaphore(url):
+            if self.max_requests is None:
+                return await asyncio.to_thread(self.fetch, url, headers)
+            share = self.listing_share if listing else 1.0
+            return await asyncio.to_thread(self.fetch, url, headers, budget=lambda: self._charge(share))
+
+    async def _prefetch(self, page_urls):
+        """
+        Prochází page_urls a vrací (url, odpověď) ve stejném pořadí; dalších
+        prefetch_pages stránek se přitom už stahuje na pozadí.
+        """
+        page_urls = iter(page_urls)
+        window = deque()
+        try:
+            while True:
+                while len(window) < self.prefetch_pages:
+                    page_url = next(page_urls, None)
+                    if page_url is None:
+                        break
+                    window.append((page_url, asyncio.create_task(self.fetch_response(page_url, listing=True))))
+                if not window:
+                    return
+                page_url, task = window.popleft()
+                yield page_url, await task
+        finally:
+            # Crawl skončil dřív (limit, prázdná stránka) – stránky navíc zahodíme
+            for _, task in window:
+                task.cancel()
+            await asyncio.gather(*(task for _, task in window), return_exceptions=True)
+
+    async def _produce(self, page_urls, extract_links, frontier, done, checkpoint, first_page,
+                       deliver, extract_cards, listed):
+        if checkpoint is not None:
+            # Po --resume nejdřív zařadíme detaily rozpracované při minulém běhu
+            for link in list(checkpoint.pending):
+                if done.is_set():
+                    break
+                if self.dedup is not None:
+                    self.dedup.claim(link)
+                await frontier.put(link)
+        page_no = first_page - 1
+        previous_links = None
+        pages = self._prefetch(page_urls)
+        try:
+            async for page_url, response in pages:
+                if done.is_set():
+                    break
+                if response is None and self.budget_exhausted():
+                    print("Vyčerpán rozpočet požadavků – končím.")
+                    break
+                if response is None and self.listing_budget_exhausted():
+                    print("Vyčerpána část rozpočtu pro listing – dál jen detaily.")
+                    break
+                page_no += 1
+                print(f"\n==== SCRAPUJI STRÁNKU č.{page_no}: {page_url} ====")
+                cards = {}
+                if response is None:
+                    links = []
+                elif extract_cards is not None:
+                    cards = {card["URL"]: card for card in extract_cards(response.content)}
+                    links = list(cards)
+                else:
+                    links = extract_links(response.content)
+                print(f"Na stránce '{page_url}' nalezeno {len(links)} inzerátů.")
+                if not links:
+                    print("Žádné další inzeráty – končím.")
+                    break
+                if previous_links is not None and set(links) == previous_links:
+                    print("Stránka je stejná jako předchozí (stránkování nefunguje) – končím.")
+                    break
+                previous_links = set(links)
+                if checkpoint is not None:
+                    links = [link for link in links if not checkpoint.is_done(link)]
+                if self.dedup is not None:
+                    # Inzerát už zařazený z jiné stránky (nebo jiného zdroje) znovu nestahujeme
+                    fresh = [link for link in links if self.dedup.claim(link)]
+                    metrics.registry.inc("duplicates_skipped_total", len(links) - len(fresh))
+                    links = fresh
+                if checkpoint is not None:
+                    checkpoint.page_listed(page_no, links)
+                for link in links:
+                    if done.is_set():
+                        break
+                    await frontier.put(link, cards.get(link))
+                if self.listing_budget_exhausted():
+                    print("Vyčerpána část rozpočtu pro listing – dál jen detaily.")
+                    break
+        finally:
+            # I při chybě nebo zrušení zahodí rozpracované stránky listingu
+            await pages.aclose()
+            listed.set()
+        await frontier.close(self.max_workers)
+
+    async def _fetch_details(self, frontier, parse_queue, done, deliver, validators, listed):
+        # S rozpočtem čekáme na celý listing, aby frontier seřadil všechny odkazy
+        await listed.wait()
+        while True:
+            link, entry = await frontier.get()
+            if link is None:
+                return
+            # Po dosažení limitu jen vyprázdníme frontu, aby producent nezůstal viset
+            if done.is_set():
+                continue
+            if self.index is not None and self.index.is_fresh(entry):
+                metrics.registry.inc("index_hits_total", kind="fresh")
+                deliver(entry["record"])
+                continue
+            if self.budget_exhausted():
+                metrics.registry.inc("budget_skipped_total")
+                continue
+            headers = self.index.conditional_headers(entry) if self.index is not None else None
+            try:
+                response = await self.fetch_response(link, headers)
+            except Exception as e:
+                print(f"Chyba při stahování detailu {link}: {e}")
+                continue
+            if response is None:
+                # Neúspěšný detail zůstává v checkpointu rozpracovaný – --resume ho zkusí znovu
+                if not self.budget_exhausted():
+                    metrics.registry.inc("detail_failed_total")
+                    print(f"Detail {link} se nepodařilo stáhnout – přeskakuji.")
+                continue
+            if self.raw_cache is not None and response.status_code != 304 and response.content:
+                try:
+                    await asyncio.to_thread(self.raw_cache.put, link, response.content)
+                except Exception as e:
+                    metrics.registry.inc("raw_cache_errors_total")
+                    print(f"Chyba při ukládání {link} do cache: {e}")
+            if self.index is not None:
+                etag = response.headers.get("ETag")
+                last_modified = response.headers.get("Last-Modified")
+                if response.status_code == 304 and entry is not None:
+                    metrics.registry.inc("index_hits_total", kind="not_modified")
+                    self._index_call(self.index.touch, link, etag, last_modified)
+                    deliver(entry["record"])
+                    continue
+                digest = content_hash(response.content)
+                if entry is not None and entry["record"] is not None and entry["content_hash"] == digest:
+                    metrics.registry.inc("index_hits_total", kind="unchanged")
+                    self._index_call(self.index.touch, link, etag, last_modified)
+                    deliver(entry["record"])
+                    continue
+                validators[link] = (etag, last_modified, digest)
+            await parse_queue.put((link, response.content))
+
+    async def _parse_details(self, parse_detail, parse_queue, pool, deliver, validators):
+        loop = asyncio.get_running_loop()
+        finished = False
+        while not finished:
+            item = await parse_queue.get()
+            if item is None:
+                return
+            # Vezmeme vše, co už čeká ve frontě (až do velikosti dávky)
+            batch = [item]
+            while len(batch) < self.parse_batch_size and not parse_queue.empty():
+                item = parse_queue.get_nowait()
+                if item is None:
+                    finished = True
+                    break
+                batch.append(item)
+            if pool is None:
+                parsed, snapshot = await asyncio.to_thread(parse_batch, parse_detail, batch)
+            else:
+                parsed, snapshot = await loop.run_in_executor(pool, parse_batch, parse_detail, batch)
+            if snapshot is not None:
+                metrics.registry.merge(snapshot)
+            for url, record, error in parsed:
+                if error is not None:
+                    print(f"Chyba při zpracování detailu {url}: {error}")
+                    continue
+                if url in validators:
+                    etag, last_modified, digest = validators.pop(url)
+                    self._index_call(self.index.store, url, record, etag, last_modified, digest)
+                deliver(record)
+
+    async def _supervise(self, tasks):
+        """
+        Počká na všechny stage crawlu. Jakmile některá spadne, ostatní se zruší
+        a chyba se vyhodí dál – jinak by fetch workery navždy čekaly na plnou
+        frontu parseru, který už neběží.
+        """
+        try:
+            finished, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        failed = [task for task in finished if not task.cancelled() and task.exception() is not None]
+        if not failed:
+            return
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        raise failed[0].exception()
+
+    async def crawl(self, page_urls, extract_links, parse_detail,
+                    min_items=None, on_record=None,
+                    checkpoint=None, first_page=1, keep_results=True,
+                    extract_cards=None):
+        """
+        Projde stránky z page_urls a vrátí seznam naparsovaných inzerátů.
+
+        extract_links(html) vrací odkazy na detaily z listingu,
+        parse_detail(url, html) vrací slovník inzerátu; detail, který se nepodařilo
+        stáhnout, se neparsuje ani neukládá (v checkpointu zůstane rozpracovaný);
+        při parsování v procesech musí jít o funkci na úrovni modulu (kvůli pickle),
+        on_record(record) může vrátit False, pokud se má záznam zahodit (např. duplicita).
+
+        S checkpointem (checkpoint.Checkpoint) se hotové záznamy průběžně zapisují
+        přes jeho sink a stav crawlu ukládá; first_page je číslo stránky, kterou
+        page_urls začíná. keep_results=False záznamy v paměti nedrží (vrací prázdný seznam).
+
+        extract_cards(html) vrací místo odkazů rovnou záznamy z karet listingu;
+        frontier podle nich pozná známé inzeráty se změněnou cenou či nájezdem
+        (třída CHANGED). Detaily se stahují vždy – karty nemají všechny sloupce.
+        """
+        loop = asyncio.get_running_loop()
+        # Semafory jsou vázané na event loop, každý běh si je vytvoří znovu
+        self._semaphores = {}
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=self.max_workers + self.prefetch_pages))
+        self.requests_made = 0
+        frontier = Frontier(self.index, maxsize=self.frontier_size)
+        parse_queue = asyncio.Queue(maxsize=self.queue_size)
+        done = asyncio.Event()
+        listed = asyncio.Event()
+        if self.max_requests is None or self.frontier_size:
+            # Bez rozpočtu (nebo s omezeným oknem, které by producenta zablokovalo) se nečeká
+            listed.set()
+        results = []
+        collected = 0
+        validators = {}
+
+        def deliver(record):
+            nonlocal collected
+            if done.is_set():
+                return
+            if is_empty_record(record):
+                # Nic nezjištěno (rozbitý detail) – nezapisuje se a v checkpointu zůstane rozpracovaný
+                metrics.registry.inc("empty_records_total")
+                print(f"Z detailu {record.get('URL')} se nepodařilo nic zjistit – přeskakuji.")
+                return
+            accepted = True
+            if self.dedup is not None and not self.dedup.add_record(record):
+                metrics.registry.inc("duplicates_total")
+                accepted = False
+            elif on_record is not None:
+                accepted = on_record(record) is not False
+            if checkpoint is not None:
+                checkpoint.record_done(record["URL"], record if accepted else None)
+            if not accepted:
+                return
+            collected += 1
+            metrics.registry.inc("records_total")
+            if keep_results:
+                results.append(record)
+            if min_items is not None and collected >= min_items:
+                print(f"Dosaženo {min_items} inzerátů – končím.")
+                done.set()
+
+        pool = (ProcessPoolExecutor(max_workers=self.parse_processes, mp_context=_parse_pool_context(),
+                                    initializer=_init_parse_worker)
+                if self.parse_processes else None)
+        parsers_count = self.parse_processes or 1
+
+        async def feed(fetchers):
+            await self._produce(page_urls, extract_links, frontier, done, checkpoint, first_page,
+                                deliver, extract_cards, listed)
+            await asyncio.gather(*fetchers)
+            for _ in range(parsers_count):
+                await parse_queue.put(None)
+
+        try:
+            parsers = [
+                asyncio.create_task(self._parse_details(parse_detail, parse_queue, pool, deliver, validators))
+                for _ in range(parsers_count)
+            ]
+            fetchers = [
+                asyncio.create_task(self._fetch_details(frontier, parse_queue, done, deliver, validators, listed))
+                for _ in range(self.max_workers)
+            ]
+            await self._supervise(parsers + fetchers + [asyncio.create_task(feed(fetchers))])
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+        return results
+
+    def run(self, page_urls, extract_links, parse_detail, **kwargs):
+        """
+        Synchronní obal nad crawl() pro použití ze skriptů.
+        """
+        return asyncio.run(self.crawl(page_urls, extract_links, parse_detail, **kwargs))
@@ -0,0 +1,220 @@
+import argparse
+import os
+import socket
+import threading
+import time
+from urllib.parse import urlsplit
+
+import aaaauto_scraper
+import http_client
+import metrics
+import sauto_scraper
+from dedup_index import DedupIndex, is_empty_record
+from sink import open_sink
+from work_queue import open_queue, serve_queue
+
+SAUTO_URL = "https://www.sauto.cz/inzerce/osobni"
+
+# Zdroje crawlu: doména, URL stránky listingu, stažení, odkazy z listingu a parser detailu
+SOURCES = {
+    "sauto": {
+        "domain": "sauto.cz",
+        "page_url": lambda page: next(sauto_scraper.sauto_page_urls(SAUTO_URL, page, page)),
+        "fetch": sauto_scraper.fetch_response,
+        "session": sauto_scraper.session,
+        "extract_links": sauto_scraper.extract_listing_links,
+        "parse": sauto_scraper.parse_sauto_html,
+    },
+    "aaaauto": {
+        "domain": "aaaauto.cz",
+        "page_url": lambda page: next(aaaauto_scraper.aaaauto_page_urls(page, page)),
+        "fetch": lambda url, headers=None: aaaauto_scraper.fetch_response(url, aaaauto_scraper.session, headers),
+        "session": aaaauto_scraper.session,
+        "extract_links": aaaauto_scraper.extract_listing_links,
+        "parse": aaaauto_scraper.parse_aaaauto_html,
+    },
+}
+
+
+def listing_task(source, page, last_page):
+    return {"kind": "listing", "source": source, "url": SOURCES[source]["page_url"](page),
+            "page": page, "last_page": last_page}
+
+
+def check_task(task):
+    """
+    Ověří úkol přijatý síťovou frontou: známý zdroj a druh úkolu a URL na doméně
+    zdroje. Jinak vyhodí ValueError – workery by stahovaly cokoli, co do fronty přijde.
+    """
+    source = SOURCES.get(task.get("source"))
+    if source is None:
+        raise ValueError(f"Neznámý zdroj {task.get('source')!r}")
+    if task.get("kind") not in ("listing", "detail"):
+        raise ValueError(f"Neznámý druh úkolu {task.get('kind')!r}")
+    parts = urlsplit(str(task.get("url", "")))
+    host = (parts.hostname or "").lower()
+    if parts.scheme not in ("http", "https") or not (host == source["domain"] or host.endswith("." + source["domain"])):
+        raise ValueError(f"URL {task.get('url')!r} nepatří zdroji {task['source']}")
+
+
+def seed(queue, sources, max_pages):
+    """
+    Vloží do fronty první stránku listingu každého zdroje; další stránky
+    přidávají workery postupně (nejvýš max_pages).
+    """
+    added = queue.put([listing_task(source, 1, max_pages) for source in sources])
+    print(f"Do fronty přidáno {added} úkolů.")
+    return added
+
+
+def process_task(queue, worker, task):
+    """
+    Stáhne a zpracuje jeden úkol a potvrdí ho ve frontě. Listing přidá odkazy
+    na detaily a další stránku, detail se naparsuje parserem zdroje.
+    """
+    source = SOURCES[task["source"]]
+    response = source["fetch"](task["url"])
+    if response is None:
+        queue.nack(task["id"], worker, "stažení selhalo")
+        metrics.registry.inc("queue_tasks_total", kind=task["kind"], outcome="retry")
+        return None
+    if task["kind"] == "listing":
+        links = source["extract_links"](response.content)
+        print(f"Na stránce '{task['url']}' nalezeno {len(links)} inzerátů.")
+        details = [{"kind": "detail", "source": task["source"], "url": link} for link in links]
+        follow = []
+        if task["page"] < task["last_page"]:
+            follow.append(listing_task(task["source"], task["page"] + 1, task["last_page"]))
+        queue.ack(task["id"], worker, tasks=details, follow=follow)
+        record = None
+    else:
+        record = source["parse"](task["url"], response.content)
+        if not queue.ack(task["id"], worker, record=record):
+            # Pronájem mezitím vypršel a úkol dělá jiný worker
+            record = None
+    metrics.registry.inc("queue_tasks_total", kind=task["kind"], outcome="done")
+    return record
+
+
+def run_worker(queue, worker=None, threads=4, batch=1, poll_interval=2.0):
+    """
+    Zpracovává úkoly z fronty v threads vláknech, dokud ve frontě nejsou žádné
+    čekající ani pronajaté úkoly. Na jednom stroji lze spustit víc procesů
+    workeru (parsování v jednom procesu drží GIL). Vrací počet zpracovaných detailů.
+    """
+    worker = worker or f"{socket.gethostname()}-{os.getpid()}"
+    for source in SOURCES.values():
+        http_client.mount_pool(source["session"], threads)
+    progress = metrics.Progress(f"worker {worker}")
+    lock = threading.Lock()
+
+    def loop():
+        while True:
+            tasks = queue.lease(worker, batch)
+            if not tasks:
+                stats = queue.stats()
+                if not stats["pending"] and not stats["leased"]:
+                    return
+                # Zbývající úkoly mají pronajaté jiné workery – počkáme, zda je dokončí
+                time.sleep(poll_interval)
+                continue
+            for task in tasks:
+                try:
+                    record = process_task(queue, worker, task)
+                except Exception as e:
+                    print(f"Chyba při zpracování {task['url']}: {e}")
+                    queue.nack(task["id"], worker, str(e))
+                    continue
+                if record is not None:
+                    with lock:
+                        progress.update()
+
+    workers = [threading.Thread(target=loop, daemon=True) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    print(f"Worker {worker} končí, zpracováno {progress.count} detailů.")
+    return progress.count
+
+
+def merge(queue, outputs):
+    """
+    Zapíše výsledky z fronty do výstupů podle zdroje (outputs: zdroj -> soubor,
+    CSV nebo ".parquet"). Duplicity napříč zdroji i URL hlídá DedupIndex
+    stejně jako při crawlu. Vrací počet uložených záznamů pro každý zdroj.
+    """
+    if not hasattr(queue, "results"):
+        raise SystemExit("Výsledky lze sloučit jen na stroji se SQLite souborem fronty.")
+    sinks = {source: open_sink(path) for source, path in outputs.items()}
+    counts = {source: 0 for source in outputs}
+    dedup = DedupIndex()
+    try:
+        for source, record in queue.results():
+            if source in sinks and not is_empty_record(record) and dedup.add_record(record):
+                sinks[source].write(record)
+                counts[source] += 1
+    finally:
+        for sink in sinks.values():
+            sink.close()
+    for source, count in counts.items():
+        print(f"{source}: uloženo {count} záznamů do '{outputs[source]}'.")
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Distribuovaný crawl přes sdílenou frontu úkolů")
+    parser.add_argument("--queue", default="crawl_queue.sqlite",
+                        help="SQLite soubor fronty, nebo http://host:port fronty spuštěné přes serve")
+    parser.add_argument("--token", default=os.environ.get("CRAWL_QUEUE_TOKEN"),
+                        help="sdílený token pro síťovou frontu (výchozí z CRAWL_QUEUE_TOKEN)")
+    parser.add_argument("--lease", type=int, default=300,
+                        help="délka pronájmu úkolu v sekundách (pro SQLite frontu)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    seed_cmd = sub.add_parser("seed", help="založit crawl – vložit první stránky listingu")
+    seed_cmd.add_argument("--sources", nargs="+", default=list(SOURCES), choices=list(SOURCES))
+    seed_cmd.add_argument("--max-pages", type=int, default=10000)
+
+    work = sub.add_parser("work", help="zpracovávat úkoly z fronty")
+    work.add_argument("--worker", default=None, help="jméno workeru (výchozí host-pid)")
+    work.add_argument("--threads", type=int, default=4)
+    work.add_argument("--metrics", default=None, help="kam uložit metriky workeru (.json nebo .prom)")
+
+    serve = sub.add_parser("serve", help="zpřístupnit SQLite frontu workerům na jiných strojích")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8765)
+
+    sub.add_parser("status", help="vypsat stav fronty")
+
+    merge_cmd = sub.add_parser("merge", help="zapsat výsledky z fronty do výstupů")
+    merge_cmd.add_argument("--sauto-output", default="auta_sauto.csv")
+    merge_cmd.add_argument("--aaaauto-output", default="auta_aaaauto.csv")
+    args = parser.parse_args()
+
+    queue = open_queue(args.queue, token=args.token, lease_seconds=args.lease)
+    try:
+        if args.command == "seed":
+            seed(queue, args.sources, args.max_pages)
+        elif args.command == "work":
+            try:
+                run_worker(queue, args.worker, threads=args.threads)
+            finally:
+                if args.metrics:
+                    metrics.registry.export(args.metrics)
+        elif args.command == "serve":
+            try:
+                serve_queue(queue, args.host, args.port, token=args.token, validate_task=check_task)
+            except ValueError as e:
+                raise SystemExit(str(e))
+        elif args.command == "status":
+            for state, count in queue.stats().items():
+                print(f"{state:>8}: {count}")
+        else:
+            merge(queue, {"sauto": args.sauto_output, "aaaauto": args.aaaauto_output})
+    finally:
+        queue.close()
+
+
+if __name__ == "__main__":
+    main()
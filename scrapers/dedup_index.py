@@ -0,0 +1,102 @@
+import hashlib
+import re
+import threading
+from urllib.parse import urlsplit, urlunsplit
+
+from normalization import UNKNOWN, normalize_fuel, normalize_transmission
+
+# ID inzerátu v URL detailu – podle něj poznáme stejný inzerát i pod jinou adresou
+AD_ID_PATTERNS = (
+    ("sauto", re.compile(r"sauto\.cz/.*?/detail/(?:[^/]+/){2}(\d+)")),
+    ("aaaauto", re.compile(r"aaaauto\.cz/.*?car\.html\?(?:.*&)?id=(\d+)")),
+)
+
+FINGERPRINT_FIELDS = ("Značka", "Model", "Rok", "Najeté km", "Cena", "Palivo", "Převodovka", "Výkon (kW)")
+NUMERIC_FIELDS = ("Rok", "Najeté km", "Cena", "Výkon (kW)")
+
+
+def canonical_ad_key(url):
+    """
+    Kanonický klíč inzerátu z URL: "zdroj:id", pokud URL obsahuje ID inzerátu,
+    jinak URL bez fragmentu a s hostem malými písmeny.
+    """
+    for source, pattern in AD_ID_PATTERNS:
+        match = pattern.search(url)
+        if match:
+            return f"{source}:{match.group(1)}"
+    parts = urlsplit(url)
+    return urlunsplit((parts.scheme, parts.netloc.lower(), parts.path.rstrip("/"), parts.query, ""))
+
+
+def _fingerprint_value(field, value):
+    if value == UNKNOWN or value is None:
+        return ""
+    if field in NUMERIC_FIELDS:
+        # "98 500", "98500 km" i 98500 -> "98500"
+        return "".join(ch for ch in str(value) if ch.isdigit())
+    if field == "Palivo":
+        return normalize_fuel(value)
+    if field == "Převodovka":
+        return normalize_transmission(value)
+    return str(value).strip().lower()
+
+
+def is_empty_record(record):
+    """
+    True, pokud záznam nemá zjištěný žádný z atributů otisku (např. rozbitý detail).
+    """
+    return all(_fingerprint_value(field, record.get(field)) == "" for field in FINGERPRINT_FIELDS)
+
+
+def record_fingerprint(record):
+    """
+    Kompaktní otisk záznamu (8 bajtů jako int) z normalizovaných atributů kromě URL,
+    takže stejné auto ze Sauto i AAA Auto dá stejný otisk i při jiném formátu čísel.
+    """
+    key = "\x1f".join(_fingerprint_value(field, record.get(field)) for field in FINGERPRINT_FIELDS)
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class DedupIndex:
+    """
+    Deduplikace pro celý crawl, sdílitelná mezi Sauto a AAA Auto.
+
+    claim(url) se volá před stažením detailu – inzerát, který už byl zařazen
+    (i z jiné stránky listingu), se znovu nestahuje ani neparsuje.
+    add_record(record) se volá po naparsování a zahodí záznam se stejným
+    otiskem (stejné auto pod jiným ID nebo z druhého zdroje).
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.keys = set()
+        self.fingerprints = set()
+
+    def claim(self, url):
+        """
+        Zaregistruje inzerát podle URL. Vrací False, pokud už byl zaregistrován.
+        """
+        key = canonical_ad_key(url)
+        with self.lock:
+            if key in self.keys:
+                return False
+            self.keys.add(key)
+            return True
+
+    def add_record(self, record):
+        """
+        Zaregistruje otisk záznamu. Vrací False, pokud stejný záznam už je.
+        Prázdný záznam (is_empty_record) by měl otisk shodný se všemi ostatními
+        prázdnými – takový se odmítne s ValueError.
+        """
+        if is_empty_record(record):
+            raise ValueError(f"Záznam {record.get('URL')} nemá žádné zjištěné údaje")
+        fingerprint = record_fingerprint(record)
+        with self.lock:
+            if fingerprint in self.fingerprints:
+                return False
+            self.fingerprints.add(fingerprint)
+            return True
+
+    def __len__(self):
+        return len(self.fingerprints)
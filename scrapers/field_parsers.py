@@ -0,0 +1,89 @@
+import re
+from datetime import date
+
+import metrics
+
+# Číslo s mezerou, (úzkou) nedělitelnou mezerou nebo tečkou jako oddělovačem tisíců
+# ("98 500", "1.250.000"), jinak prostá číslice ("98500")
+NUMBER = re.compile(r"\d{1,3}(?:[ \xa0\u202f.]\d{3})+(?!\d)|\d+")
+THOUSANDS_SEPARATORS = re.compile(r"[ \xa0\u202f.]")
+# Rok samotný ("2014") nebo s měsícem ("5/2014", "05 / 2014")
+YEAR = re.compile(r"^(?:(\d{1,2})\s*/\s*)?(\d{4})$")
+# Výkon v kW ("110 kW", "110,5kW") a v koních ("150 k", "150 koní", "150 PS", "150 hp")
+POWER_KW = re.compile(r"(\d+(?:[.,]\d+)?)\s*kw", re.IGNORECASE)
+POWER_HP = re.compile(r"(\d+)\s*(?:k|koní|ps|hp)\b", re.IGNORECASE)
+HP_TO_KW = 0.7355
+
+# Povolené rozsahy polí – hodnoty mimo se zahodí jako nezjištěné
+RANGES = {
+    "Rok": (1900, date.today().year + 1),
+    "Najeté km": (0, 2_000_000),
+    "Cena": (1_000, 100_000_000),
+    "Výkon (kW)": (1, 1_500),
+}
+
+
+def _checked(field, value):
+    if value is None:
+        return None
+    low, high = RANGES[field]
+    if not low <= value <= high:
+        metrics.registry.inc("field_rejected_total", field=field)
+        return None
+    return value
+
+
+def parse_number(text):
+    """
+    První celé číslo v textu (oddělovače tisíců se ignorují), jinak None.
+    """
+    if text is None:
+        return None
+    match = NUMBER.search(str(text))
+    if not match:
+        return None
+    return int(THOUSANDS_SEPARATORS.sub("", match.group()))
+
+
+def parse_year(text):
+    """
+    Rok z "2014" nebo "5/2014" (měsíc se zahodí). Jiný formát nebo rok mimo
+    rozsah vrací None.
+    """
+    if text is None:
+        return None
+    match = YEAR.match(str(text).strip())
+    if not match:
+        return None
+    return _checked("Rok", int(match.group(2)))
+
+
+def parse_km(text):
+    """
+    Najeté km z "98 500 km", "98500 km" nebo "98500". None, pokud číslo chybí nebo je mimo rozsah.
+    """
+    return _checked("Najeté km", parse_number(text))
+
+
+def parse_price(text):
+    """
+    Cena v Kč z "329 900 Kč", "1.299.000,- Kč" apod. "Cena na dotaz" a nesmyslné ceny vrací None.
+    """
+    return _checked("Cena", parse_number(text))
+
+
+def parse_power(text):
+    """
+    Výkon v kW z "110 kW", "110 kW / 150 k" i jen "150 k" (koně se přepočtou na kW).
+    Číslo bez jednotky se bere jako kW.
+    """
+    if text is None:
+        return None
+    text = str(text)
+    match = POWER_KW.search(text)
+    if match:
+        return _checked("Výkon (kW)", round(float(match.group(1).replace(",", "."))))
+    match = POWER_HP.search(text)
+    if match:
+        return _checked("Výkon (kW)", round(int(match.group(1)) * HP_TO_KW))
+    return _checked("Výkon (kW)", parse_number(text))
@@ -0,0 +1,92 @@
+import asyncio
+import itertools
+
+import metrics
+from normalization import UNKNOWN
+
+# Třídy priority (nižší = dřív)
+FRESH = 0      # čerstvý záznam v indexu – nic nestojí, vyřídí se hned
+NEW = 1        # inzerát, který ještě neznáme
+CHANGED = 2    # karta v listingu se liší od uloženého záznamu (např. nová cena)
+STALE = 3      # známý inzerát – čím starší kopie, tím dřív
+_SENTINEL = 9  # konec fronty pro workery, řadí se za všechny odkazy
+
+CLASS_NAMES = {FRESH: "fresh", NEW: "new", CHANGED: "changed", STALE: "stale"}
+
+# Pole karty, jejichž změna proti uloženému záznamu znamená, že se inzerát změnil
+CHANGE_FIELDS = ("Cena", "Najeté km")
+
+
+def _card_changed(card, record):
+    for field in CHANGE_FIELDS:
+        value = card.get(field, UNKNOWN)
+        if value != UNKNOWN and str(value) != str(record.get(field, UNKNOWN)):
+            return True
+    return False
+
+
+class Frontier:
+    """
+    Prioritní fronta odkazů na detaily mezi producentem a fetch workery CrawlEngine.
+
+    Pořadí: nejdřív čerstvé záznamy z indexu (bez požadavku), pak nové inzeráty
+    v pořadí listingu (nahoře jsou nejnovější), pak známé inzeráty, u kterých
+    karta v listingu ukazuje změnu, a nakonec ostatní známé od nejstarší kopie.
+    S omezeným počtem požadavků na běh (CrawlEngine max_requests) se tak rozpočet
+    utratí za inzeráty, které se nejspíš změnily. Bez indexu jsou všechny odkazy
+    "nové" a fronta se chová jako FIFO.
+
+    Kdy které třídy nastávají:
+    - NEW a STALE kdykoli je zapnutý index (výchozí u obou scraperů i run_pipeline).
+    - FRESH jen s index_max_age (CLI --index-max-age), jinak je každý záznam
+      v indexu zastaralý a ověří se podmíněným požadavkem.
+    - CHANGED jen u zdrojů, které předávají karty listingu (extract_cards) –
+      zatím Sauto (s indexem). AAA Auto karty nečte, jeho známé inzeráty
+      jsou vždy STALE.
+
+    maxsize omezuje, kolik odkazů producent načte dopředu – čím větší okno,
+    tím víc odkazů se může předběhnout (0 = neomezeně).
+    """
+
+    def __init__(self, index=None, maxsize=0):
+        self.index = index
+        self.queue = asyncio.PriorityQueue(maxsize)
+        self._seq = itertools.count()
+
+    def classify(self, link, card=None):
+        """
+        Vrátí (priorita, záznam z indexu nebo None) pro odkaz.
+        """
+        entry = None
+        if self.index is not None:
+            try:
+                entry = self.index.get(link)
+            except Exception as e:
+                # Nedostupný index – inzerát se stáhne jako nový
+                metrics.registry.inc("index_errors_total")
+                print(f"Chyba indexu pro {link}: {e}")
+        if entry is None or entry["record"] is None:
+            return (NEW, 0.0), entry
+        if self.index.is_fresh(entry):
+            return (FRESH, 0.0), entry
+        if card is not None and _card_changed(card, entry["record"]):
+            return (CHANGED, 0.0), entry
+        # Starší kopie = menší fetched_at = dřív
+        return (STALE, entry["fetched_at"] or 0.0), entry
+
+    async def put(self, link, card=None):
+        priority, entry = self.classify(link, card)
+        metrics.registry.inc("frontier_links_total", kind=CLASS_NAMES[priority[0]])
+        await self.queue.put((priority, next(self._seq), link, entry))
+
+    async def get(self):
+        """
+        Vrátí (odkaz, záznam z indexu), nebo (None, None) na konci fronty.
+        """
+        _, _, link, entry = await self.queue.get()
+        return link, entry
+
+    async def close(self, workers):
+        # Zarážky se řadí za všechny odkazy – každý worker dostane jednu až po práci
+        for _ in range(workers):
+            await self.queue.put(((_SENTINEL, 0.0), next(self._seq), None, None))
@@ -0,0 +1,183 @@
+import codecs
+import time
+from functools import lru_cache
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+import metrics
+
+try:
+    import lxml.html
+    from lxml import etree
+except ImportError:  # lxml je volitelná závislost
+    lxml = None
+
+BACKENDS = ("lxml", "bs4")
+DEFAULT_BACKEND = "lxml" if lxml is not None else "bs4"
+
+
+def _join_text(pieces, sep):
+    # Stejná sémantika jako BeautifulSoup.get_text(sep, strip=True)
+    return sep.join(p.strip() for p in pieces if p.strip())
+
+
+class BsNode:
+    """
+    Obal nad prvkem BeautifulSoup.
+    """
+
+    def __init__(self, el):
+        self.el = el
+
+    def find(self, tag, cls=None):
+        found = self.el.find(tag, class_=cls) if cls else self.el.find(tag)
+        return BsNode(found) if found is not None else None
+
+    def find_all(self, tag, cls=None):
+        found = self.el.find_all(tag, class_=cls) if cls else self.el.find_all(tag)
+        return [BsNode(el) for el in found]
+
+    def text(self, sep=""):
+        return self.el.get_text(sep, strip=True)
+
+    def get(self, attr):
+        return self.el.get(attr)
+
+
+@lru_cache(maxsize=None)
+def _xpath(tag, cls):
+    """
+    Zkompiluje (a zacachuje) XPath pro tag s danými třídami – všechny třídy z cls musí sedět.
+    """
+    expr = f"descendant::{tag}"
+    for name in (cls or "").split():
+        expr += f"[contains(concat(' ', normalize-space(@class), ' '), ' {name} ')]"
+    return etree.XPath(expr)
+
+
+class LxmlNode:
+    """
+    Obal nad prvkem lxml.
+    """
+
+    def __init__(self, el):
+        self.el = el
+
+    def find(self, tag, cls=None):
+        found = _xpath(tag, cls)(self.el)
+        return LxmlNode(found[0]) if found else None
+
+    def find_all(self, tag, cls=None):
+        return [LxmlNode(el) for el in _xpath(tag, cls)(self.el)]
+
+    def text(self, sep=""):
+        return _join_text(self.el.xpath("descendant::text()"), sep)
+
+    def get(self, attr):
+        return self.el.get(attr)
+
+
+def parse(html, backend=None):
+    """
+    Naparsuje HTML zvoleným backendem a vrátí kořenový uzel se společným rozhraním
+    (find, find_all, text, get).
+
+    "lxml" staví strom v C a hledá prvky předkompilovanými XPath výrazy,
+    "bs4" je původní BeautifulSoup s html.parser – fallback, pokud lxml chybí.
+    Bez zadání se použije DEFAULT_BACKEND. html může být i surové bytes (UTF-8).
+    """
+    backend = backend or DEFAULT_BACKEND
+    if isinstance(html, bytes):
+        html = html.decode("utf-8", errors="replace")
+    with metrics.registry.timer("parse_tree_seconds", backend=backend):
+        return _build_tree(html, backend)
+
+
+def _build_tree(html, backend):
+    if backend == "lxml":
+        if lxml is None:
+            raise ValueError("Backend 'lxml' vyžaduje nainstalovaný balíček lxml.")
+        try:
+            return LxmlNode(lxml.html.document_fromstring(html))
+        except etree.ParserError:
+            # Prázdný dokument – lxml ho odmítne, BeautifulSoup vrátí prázdný strom
+            return LxmlNode(lxml.html.document_fromstring("<html></html>"))
+    if backend == "bs4":
+        return BsNode(BeautifulSoup(html, "html.parser"))
+    raise ValueError(f"Neznámý HTML backend: {backend}")
+
+
+def _compile_targets(targets):
+    # tag -> [(index cíle, množina požadovaných tříd nebo None)]
+    by_tag = {}
+    for i, (tag, cls) in enumerate(targets):
+        by_tag.setdefault(tag, []).append((i, frozenset(cls.split()) if cls else None))
+    return by_tag
+
+
+def _matching(by_tag, tag, classes):
+    # Indexy cílů, kterým prvek odpovídá – musí mít všechny třídy cíle (jako _xpath)
+    for i, required in by_tag.get(tag, ()):
+        if required is None or required <= set((classes or "").split()):
+            yield i
+
+
+def iter_matches(html, targets, backend=None, chunk_size=8192):
+    """
+    Proudově prochází HTML a vrací dvojice (index cíle, uzel) pro prvky podle
+    targets – seznamu dvojic (tag, cls), cls může být None. Uzel má společné
+    rozhraní (find, find_all, text, get) a je vždy celý načtený.
+
+    "lxml" parsuje po kusech chunk_size znaků (HTMLPullParser) a prvky vrací
+    v pořadí, v jakém se uzavírají. Jakmile volající přestane iterovat (break),
+    zbytek dokumentu se už neparsuje – detail tak nemusí číst patičku a skripty.
+    "bs4" nemá proudové parsování, přes SoupStrainer ale staví jen podstromy
+    cílových tagů a prvky vrací v pořadí dokumentu.
+    """
+    backend = backend or DEFAULT_BACKEND
+    by_tag = _compile_targets(targets)
+    if backend == "lxml":
+        if lxml is None:
+            raise ValueError("Backend 'lxml' vyžaduje nainstalovaný balíček lxml.")
+        yield from _iter_lxml(html, by_tag, chunk_size)
+    elif backend == "bs4":
+        if isinstance(html, bytes):
+            html = html.decode("utf-8", errors="replace")
+        start = time.perf_counter()
+        soup = BeautifulSoup(html, "html.parser", parse_only=SoupStrainer(list(by_tag)))
+        metrics.registry.observe("parse_tree_seconds", time.perf_counter() - start, backend="bs4")
+        for el in soup.find_all(list(by_tag)):
+            for i in _matching(by_tag, el.name, " ".join(el.get("class") or ())):
+                yield i, BsNode(el)
+    else:
+        raise ValueError(f"Neznámý HTML backend: {backend}")
+
+
+def _iter_lxml(html, by_tag, chunk_size):
+    parser = etree.HTMLPullParser(events=("end",), tag=tuple(by_tag))
+    # Bytes se dekódují po kusech – při předčasném konci se zbytek ani nedekóduje
+    decode = codecs.getincrementaldecoder("utf-8")(errors="replace").decode if isinstance(html, bytes) else None
+    elapsed = 0.0
+    pos = 0
+    try:
+        while pos <= len(html):
+            start = time.perf_counter()
+            if pos < len(html):
+                chunk = html[pos:pos + chunk_size]
+                parser.feed(decode(chunk) if decode else chunk)
+            else:
+                if decode:
+                    parser.feed(decode(b"", final=True))
+                try:
+                    parser.close()
+                except etree.XMLSyntaxError:
+                    pass  # Prázdný dokument – nic se nenašlo
+            pos += chunk_size
+            events = list(parser.read_events())
+            elapsed += time.perf_counter() - start
+            for _, el in events:
+                for i in _matching(by_tag, el.tag, el.get("class")):
+                    yield i, LxmlNode(el)
+    finally:
+        # Jen čas parseru (bez extrakce volajícího), i když se skončilo předčasně
+        metrics.registry.observe("parse_tree_seconds", elapsed, backend="lxml")
@@ -0,0 +1,113 @@
+import random
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+
+# Stavové kódy, u kterých má smysl požadavek zopakovat
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def mount_pool(session, pool_size):
+    """
+    Nastaví session connection pool s keep-alive o velikosti pool_size
+    (typicky max_workers), aby každé vlákno mělo vlastní otevřené spojení.
+    """
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def create_session(pool_size=10, headers=None):
+    """
+    Vytvoří sdílenou session s connection poolem a zadanými hlavičkami.
+    """
+    session = requests.Session()
+    if headers:
+        session.headers.update(headers)
+    return mount_pool(session, pool_size)
+
+
+def retry_after_seconds(response):
+    """
+    Vrátí počet sekund z hlavičky Retry-After (číslo nebo HTTP datum), jinak None.
+    """
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+def backoff_delay(attempt, base=0.5, cap=30.0):
+    """
+    Exponenciální čekání s "full jitter" – rozloží opakované pokusy vláken v čase.
+    """
+    return random.uniform(0, min(cap, base * (2 ** (attempt - 1))))
+
+
+def fetch(session, url, headers=None, timeout=10, max_retries=3,
+          backoff_base=0.5, backoff_cap=30.0, limiter=None, budget=None):
+    """
+    Stáhne URL přes session s opakováním při timeoutu, chybě spojení, 429 a 5xx.
+    Mezi pokusy čeká exponenciálně (s náhodným rozptylem), případně podle Retry-After.
+    Ostatní chyby (např. 404) se neopakují. Při neúspěchu vrací None.
+    headers jsou hlavičky navíc (např. If-None-Match), odpověď 304 se vrací jako úspěch.
+    S limiterem (rate_limiter.AdaptiveRateLimiter) každý pokus čeká na token svého
+    hostu a latence i stavové kódy se limiteru hlásí.
+    budget() se volá před každým pokusem (i opakovaným) a čerpá jeden požadavek
+    z rozpočtu; vrátí-li False, rozpočet je vyčerpaný a dál se nestahuje (None).
+    """
+    host = urlsplit(url).netloc
+    for attempt in range(1, max_retries + 1):
+        delay = None
+        if budget is not None and not budget():
+            return None
+        if limiter is not None:
+            with metrics.registry.timer("rate_limit_wait_seconds", host=host):
+                limiter.acquire(url)
+        start = time.monotonic()
+        try:
+            response = session.get(url, headers=headers, timeout=timeout)
+            latency = time.monotonic() - start
+            metrics.registry.observe("fetch_seconds", latency, host=host)
+            metrics.registry.inc("http_responses_total", host=host, status=response.status_code)
+            metrics.registry.inc("bytes_total", len(response.content), host=host)
+            if limiter is not None:
+                limiter.record(url, latency, response.status_code)
+            if response.status_code not in RETRY_STATUSES:
+                response.raise_for_status()
+                return response
+            error = f"HTTP {response.status_code}"
+            delay = retry_after_seconds(response)
+            if delay is not None and limiter is not None:
+                limiter.pause(url, min(delay, backoff_cap))
+        except (requests.Timeout, requests.ConnectionError) as e:
+            metrics.registry.inc("fetch_errors_total", host=host, kind=type(e).__name__)
+            if limiter is not None:
+                limiter.record(url, time.monotonic() - start)
+            error = e
+        except requests.RequestException as e:
+            metrics.registry.inc("fetch_failed_total", host=host)
+            print(f"Chyba při načítání {url}: {e}")
+            return None
+
+        print(f"Chyba při načítání {url} (pokus {attempt}/{max_retries}): {error}")
+        if attempt < max_retries:
+            metrics.registry.inc("retries_total", host=host)
+            if delay is None:
+                delay = backoff_delay(attempt, backoff_base, backoff_cap)
+            time.sleep(min(delay, backoff_cap))
+    metrics.registry.inc("fetch_failed_total", host=host)
+    return None
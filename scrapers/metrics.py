@@ -0,0 +1,203 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+# Hranice bucketů histogramů latence (sekundy)
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+           1.0, 2.5, 5.0, 10.0, 30.0, float("inf"))
+
+
+def _key(name, labels):
+    return (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+
+
+class Metrics:
+    """
+    Jednoduchý registr metrik crawlu: čítače a histogramy s labely.
+
+    Procesy parsovacího poolu mají vlastní registr – jejich přírůstky se
+    přes drain()/merge() přelévají do registru hlavního procesu.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+
+    def inc(self, name, value=1, **labels):
+        key = _key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = _key(name, labels)
+        with self.lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = {"count": 0, "sum": 0.0, "buckets": [0] * len(BUCKETS)}
+            hist["count"] += 1
+            hist["sum"] += value
+            for i, bound in enumerate(BUCKETS):
+                if value <= bound:
+                    hist["buckets"][i] += 1
+                    break
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """
+        Změří dobu bloku a zapíše ji do histogramu name.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def stopwatch(self, name, **labels):
+        """
+        Stopky pro měření po sobě jdoucích fází: každé lap(stage) zapíše dobu
+        od předchozího lap do histogramu name s labelem stage.
+        """
+        return Stopwatch(self, name, labels)
+
+    def count_missing(self, record, source, sentinel="Nezjištěno"):
+        """
+        Započítá pole záznamu, která parser nenaplnil (zůstala na sentinelu).
+        """
+        for field, value in record.items():
+            if value == sentinel:
+                self.inc("parse_field_missing_total", source=source, field=field)
+
+    def drain(self):
+        """
+        Vrátí dosavadní hodnoty (serializovatelné) a registr vynuluje.
+        """
+        with self.lock:
+            snapshot = (self.counters, self.histograms)
+            self.counters = {}
+            self.histograms = {}
+        return snapshot
+
+    def merge(self, snapshot):
+        """
+        Přičte hodnoty z drain() jiného registru (např. z parsovacího procesu).
+        """
+        counters, histograms = snapshot
+        with self.lock:
+            for key, value in counters.items():
+                self.counters[key] = self.counters.get(key, 0) + value
+            for key, other in histograms.items():
+                hist = self.histograms.get(key)
+                if hist is None:
+                    self.histograms[key] = {"count": other["count"], "sum": other["sum"],
+                                            "buckets": list(other["buckets"])}
+                    continue
+                hist["count"] += other["count"]
+                hist["sum"] += other["sum"]
+                hist["buckets"] = [a + b for a, b in zip(hist["buckets"], other["buckets"])]
+
+    def summary(self):
+        """
+        Souhrn pro JSON: čítače a histogramy s průměrem a odhadem p50/p95 z bucketů.
+        """
+        with self.lock:
+            counters = [{"name": name, "labels": dict(labels), "value": value}
+                        for (name, labels), value in sorted(self.counters.items())]
+            histograms = []
+            for (name, labels), hist in sorted(self.histograms.items()):
+                histograms.append({
+                    "name": name,
+                    "labels": dict(labels),
+                    "count": hist["count"],
+                    "sum": hist["sum"],
+                    "mean": hist["sum"] / hist["count"] if hist["count"] else 0.0,
+                    "p50": _quantile(hist, 0.5),
+                    "p95": _quantile(hist, 0.95),
+                    "buckets": {str(bound): n for bound, n in zip(BUCKETS, hist["buckets"])},
+                })
+        return {"counters": counters, "histograms": histograms}
+
+    def to_prometheus(self):
+        """
+        Textový formát Prometheus (exposition format).
+        """
+        lines = []
+        with self.lock:
+            for (name, labels), value in sorted(self.counters.items()):
+                lines.append(f"{name}{_prom_labels(labels)} {value}")
+            for (name, labels), hist in sorted(self.histograms.items()):
+                cumulative = 0
+                for bound, n in zip(BUCKETS, hist["buckets"]):
+                    cumulative += n
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{name}_bucket{_prom_labels(labels + (('le', le),))} {cumulative}")
+                lines.append(f"{name}_sum{_prom_labels(labels)} {hist['sum']}")
+                lines.append(f"{name}_count{_prom_labels(labels)} {hist['count']}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, path):
+        """
+        Uloží metriky do path – ".prom" jako Prometheus text, jinak JSON.
+        """
+        with open(path, "w", encoding="utf-8") as f:
+            if path.endswith(".prom"):
+                f.write(self.to_prometheus())
+            else:
+                json.dump(self.summary(), f, ensure_ascii=False, indent=2)
+        print(f"Metriky uloženy do '{path}'.")
+
+
+class Stopwatch:
+    def __init__(self, metrics, name, labels):
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+        self.last = time.perf_counter()
+
+    def lap(self, stage):
+        now = time.perf_counter()
+        self.metrics.observe(self.name, now - self.last, stage=stage, **self.labels)
+        self.last = now
+
+
+def _quantile(hist, q):
+    # Horní hranice bucketu, ve kterém leží daný kvantil
+    target = hist["count"] * q
+    cumulative = 0
+    for bound, n in zip(BUCKETS, hist["buckets"]):
+        cumulative += n
+        if cumulative >= target and n:
+            return bound
+    return 0.0
+
+
+def _prom_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+
+class Progress:
+    """
+    Průběžný výpis postupu crawlu nejvýš jednou za interval sekund –
+    náhrada za výpis každého záznamu.
+    """
+
+    def __init__(self, label, interval=5.0):
+        self.label = label
+        self.interval = interval
+        self.count = 0
+        self.start = time.monotonic()
+        self.last = self.start
+
+    def update(self, n=1):
+        self.count += n
+        now = time.monotonic()
+        if now - self.last >= self.interval:
+            self.last = now
+            rate = self.count / (now - self.start)
+            print(f"[{self.label}] nasbíráno {self.count} inzerátů ({rate:.1f}/s)")
+
+
+registry = Metrics()
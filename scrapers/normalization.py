@@ -0,0 +1,79 @@
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+UNKNOWN = "Nezjištěno"
+
+
+def transmission_rule(val):
+    """
+    Sjednotí převodovku na "Automat", "Manuál" nebo "Nezjištěno".
+    """
+    val_lower = str(val).lower().strip()
+    if "automat" in val_lower:
+        return "Automat"
+    elif "manuál" in val_lower or "manuální" in val_lower or "stupňů" in val_lower:
+        return "Manuál"
+    return UNKNOWN
+
+
+def fuel_rule(val):
+    """
+    Sjednotí palivo na základní kategorie.
+    """
+    val_lower = str(val).lower().strip()
+    if "benz" in val_lower:
+        return "Benzín"
+    elif "naft" in val_lower or "diesel" in val_lower:
+        return "Nafta"
+    elif "hybrid" in val_lower:
+        return "Hybrid"
+    elif "elekt" in val_lower:
+        return "Elektro"
+    return UNKNOWN
+
+
+class NormalizationTable:
+    """
+    Zapamatovaná tabulka surová hodnota -> normalizovaná hodnota.
+
+    Surových variant je jen pár desítek ("Benzín", "benzin + CNG", ...), takže
+    pravidlo se počítá jednou pro každou variantu. Velikost je omezená maxsize
+    (nejdéle nepoužité varianty vypadnou). Tabulku sdílí scrapery i clean_data
+    a přes unknown_variants() je vidět, které varianty padají do "Nezjištěno".
+    """
+
+    def __init__(self, rule, maxsize=4096):
+        self.rule = rule
+        self.maxsize = maxsize
+        self.table = OrderedDict()
+        self.lock = threading.Lock()
+
+    def __call__(self, val):
+        if pd.isna(val):
+            return UNKNOWN
+        with self.lock:
+            if val in self.table:
+                self.table.move_to_end(val)
+                return self.table[val]
+        result = self.rule(val)
+        with self.lock:
+            self.table[val] = result
+            if len(self.table) > self.maxsize:
+                self.table.popitem(last=False)
+        return result
+
+    def items(self):
+        with self.lock:
+            return list(self.table.items())
+
+    def unknown_variants(self):
+        """
+        Surové hodnoty, které pravidlo nezná (normalizují se na "Nezjištěno").
+        """
+        return [raw for raw, normalized in self.items() if normalized == UNKNOWN]
+
+
+normalize_transmission = NormalizationTable(transmission_rule)
+normalize_fuel = NormalizationTable(fuel_rule)
@@ -0,0 +1,95 @@
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+class HostBucket:
+    """
+    Token bucket jednoho hostu s proměnnou rychlostí (požadavků za sekundu).
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        """
+        Zarezervuje jeden token a vrátí, kolik sekund je potřeba počkat.
+        Tokeny mohou jít do mínusu – další vlákna pak čekají déle.
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            wait = 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+            return max(wait, self.paused_until - now)
+
+
+class AdaptiveRateLimiter:
+    """
+    Plánovač zdvořilosti sdílený listingem i detaily: token bucket pro každý host,
+    jehož rychlost se přizpůsobuje chování webu (AIMD).
+
+    Při 429/5xx nebo chybě spojení se rychlost sníží na polovinu, při odezvě
+    pomalejší než target_latency o desetinu; zdravé odpovědi ji postupně
+    zvyšují o increase až do max_rate. Retry-After hostu pozastaví.
+    """
+
+    def __init__(self, rate=4.0, min_rate=0.5, max_rate=20.0, burst=4,
+                 target_latency=2.0, increase=0.1):
+        self.initial_rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.target_latency = target_latency
+        self.increase = increase
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def _bucket(self, url):
+        host = urlsplit(url).netloc
+        with self.lock:
+            if host not in self.buckets:
+                self.buckets[host] = HostBucket(self.initial_rate, self.burst)
+            return self.buckets[host]
+
+    def acquire(self, url):
+        """
+        Blokuje, dokud hostu daného URL nepřísluší další požadavek.
+        """
+        wait = self._bucket(url).reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    def record(self, url, latency, status=None):
+        """
+        Zapracuje výsledek požadavku: status None znamená chybu spojení/timeout.
+        """
+        bucket = self._bucket(url)
+        with bucket.lock:
+            if status is None or status == 429 or status >= 500:
+                bucket.rate = max(self.min_rate, bucket.rate / 2)
+            elif latency > self.target_latency:
+                bucket.rate = max(self.min_rate, bucket.rate * 0.9)
+            else:
+                bucket.rate = min(self.max_rate, bucket.rate + self.increase)
+
+    def pause(self, url, seconds):
+        """
+        Pozastaví host na seconds sekund (např. podle Retry-After).
+        """
+        bucket = self._bucket(url)
+        with bucket.lock:
+            bucket.paused_until = max(bucket.paused_until, time.monotonic() + seconds)
+
+    def rates(self):
+        """
+        Aktuální rychlost (požadavků/s) pro každý host.
+        """
+        with self.lock:
+            return {host: bucket.rate for host, bucket in self.buckets.items()}
@@ -0,0 +1,206 @@
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+
+try:
+    import zstandard
+except ImportError:  # zstandard je volitelný, bez něj se komprimuje zlibem
+    zstandard = None
+
+from seen_index import content_hash
+
+CODEC_EXTENSIONS = {"zstd": ".zst", "zlib": ".zz"}
+
+
+def compress(content, codec, level):
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=level).compress(content)
+    return zlib.compress(content, min(level, 9))
+
+
+def load_blob(path):
+    """
+    Načte a rozbalí uloženou stránku (kodek podle přípony souboru).
+    Funkce na úrovni modulu, aby ji mohly volat i procesy při hromadném parsování.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    if path.endswith(CODEC_EXTENSIONS["zstd"]):
+        if zstandard is None:
+            raise ValueError(f"'{path}' je komprimovaný zstd – nainstalujte balíček zstandard.")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+
+class RawCache:
+    """
+    Komprimovaná cache surových stránek detailů na disku pro pozdější přeparsování.
+
+    Obsah je adresovaný hashem (seen_index.content_hash): stejná stránka je na disku
+    jen jednou, i když je pod víc URL. SQLite index v path/index.sqlite mapuje
+    URL -> hash poslední verze a drží čas posledního přístupu. Když celková velikost
+    komprimovaných souborů přesáhne max_bytes, mažou se nejdéle nepoužité stránky (LRU).
+    Komprimuje se zstd (balíček zstandard), bez něj zlibem.
+
+    Každé put() je jedna krátká transakce (BEGIN IMMEDIATE) a celková velikost se
+    vede v indexu, ne v instanci – adresář tak může sdílet víc instancí i procesů
+    a limit max_bytes platí pro všechny dohromady.
+    """
+
+    def __init__(self, path="raw_cache", max_bytes=2 * 1024 ** 3, level=3, timeout=30.0):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.level = level
+        self.codec = "zstd" if zstandard is not None else "zlib"
+        os.makedirs(os.path.join(path, "objects"), exist_ok=True)
+        self.lock = threading.Lock()
+        # Transakce řídíme sami, aby kontrola a zápis blobu byly atomické i mezi procesy
+        self.conn = sqlite3.connect(os.path.join(path, "index.sqlite"), timeout=timeout,
+                                    isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self._transaction():
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS pages (
+                    url TEXT PRIMARY KEY,
+                    content_hash TEXT NOT NULL,
+                    stored_at REAL,
+                    last_access REAL
+                )
+            """)
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS blobs (
+                    content_hash TEXT PRIMARY KEY,
+                    file TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    raw_size INTEGER NOT NULL
+                )
+            """)
+            self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS pages_access ON pages (last_access)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS pages_hash ON pages (content_hash)")
+            # Cache ze starší verze velikost v meta nemá – spočítá se jednou z blobs
+            self.conn.execute("INSERT OR IGNORE INTO meta (key, value) "
+                              "SELECT 'total_bytes', COALESCE(SUM(size), 0) FROM blobs")
+
+    @contextmanager
+    def _transaction(self):
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+
+    @property
+    def total_bytes(self):
+        with self.lock:
+            return self._total_bytes()
+
+    def _total_bytes(self):
+        return self.conn.execute("SELECT value FROM meta WHERE key = 'total_bytes'").fetchone()[0]
+
+    def _add_bytes(self, delta):
+        self.conn.execute("UPDATE meta SET value = value + ? WHERE key = 'total_bytes'", (delta,))
+
+    def _blob_path(self, digest):
+        return os.path.join(self.path, "objects", digest[:2], digest + CODEC_EXTENSIONS[self.codec])
+
+    def put(self, url, content):
+        """
+        Uloží stránku URL (bytes) a vrátí její hash.
+        """
+        digest = content_hash(content)
+        now = time.time()
+        with self.lock:
+            known = self.conn.execute("SELECT 1 FROM blobs WHERE content_hash = ?", (digest,)).fetchone()
+        # Komprese mimo transakci, ať zámek databáze drží jen zápis
+        data = compress(content, self.codec, self.level) if known is None else None
+        with self._transaction():
+            if self.conn.execute("SELECT 1 FROM blobs WHERE content_hash = ?", (digest,)).fetchone() is None:
+                if data is None:
+                    # Blob mezitím smazala jiná instance (eviction)
+                    data = compress(content, self.codec, self.level)
+                blob_path = self._blob_path(digest)
+                os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                tmp_path = f"{blob_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, blob_path)
+                self.conn.execute("INSERT INTO blobs (content_hash, file, size, raw_size) VALUES (?, ?, ?, ?)",
+                                  (digest, os.path.relpath(blob_path, self.path), len(data), len(content)))
+                self._add_bytes(len(data))
+            previous = self.conn.execute("SELECT content_hash FROM pages WHERE url = ?", (url,)).fetchone()
+            self.conn.execute("INSERT OR REPLACE INTO pages (url, content_hash, stored_at, last_access) "
+                              "VALUES (?, ?, ?, ?)", (url, digest, now, now))
+            if previous is not None and previous[0] != digest:
+                self._drop_unreferenced(previous[0])
+            if self._total_bytes() > self.max_bytes:
+                self._evict()
+        return digest
+
+    def get(self, url):
+        """
+        Vrátí uloženou stránku URL (bytes), nebo None.
+        """
+        with self._transaction():
+            row = self.conn.execute(
+                "SELECT b.file FROM pages p JOIN blobs b ON b.content_hash = p.content_hash WHERE p.url = ?",
+                (url,)).fetchone()
+            if row is not None:
+                self.conn.execute("UPDATE pages SET last_access = ? WHERE url = ?", (time.time(), url))
+        if row is None:
+            return None
+        return load_blob(os.path.join(self.path, row[0]))
+
+    def entries(self):
+        """
+        Seznam (url, cesta k souboru) všech uložených stránek – pro hromadné přeparsování.
+        """
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT p.url, b.file FROM pages p JOIN blobs b ON b.content_hash = p.content_hash "
+                "ORDER BY p.url").fetchall()
+        return [(url, os.path.join(self.path, file)) for url, file in rows]
+
+    def stats(self):
+        with self.lock:
+            pages = self.conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+            blobs, size, raw_size = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(raw_size), 0) FROM blobs").fetchone()
+        return {"pages": pages, "blobs": blobs, "bytes": size, "raw_bytes": raw_size}
+
+    def _drop_unreferenced(self, digest):
+        if self.conn.execute("SELECT 1 FROM pages WHERE content_hash = ? LIMIT 1", (digest,)).fetchone():
+            return
+        row = self.conn.execute("SELECT file, size FROM blobs WHERE content_hash = ?", (digest,)).fetchone()
+        if row is None:
+            return
+        self.conn.execute("DELETE FROM blobs WHERE content_hash = ?", (digest,))
+        self._add_bytes(-row[1])
+        try:
+            os.remove(os.path.join(self.path, row[0]))
+        except FileNotFoundError:
+            pass
+
+    def _evict(self):
+        # Mažeme po dávkách nejdéle nepoužitých stránek, dokud se nevejdeme do limitu
+        while self._total_bytes() > self.max_bytes:
+            oldest = self.conn.execute(
+                "SELECT url, content_hash FROM pages ORDER BY last_access LIMIT 100").fetchall()
+            if not oldest:
+                break
+            for url, digest in oldest:
+                self.conn.execute("DELETE FROM pages WHERE url = ?", (url,))
+                self._drop_unreferenced(digest)
+                if self._total_bytes() <= self.max_bytes:
+                    break
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
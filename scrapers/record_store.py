@@ -0,0 +1,194 @@
+import re
+from array import array
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:  # pyarrow je potřeba jen pro to_arrow()
+    pa = None
+
+from normalization import UNKNOWN
+from schema import ARROW_SCHEMA, COLUMNS, INT_LIMITS, SCHEMA
+
+# Typ pole pro číselné sloupce podle SCHEMA
+ARRAY_TYPECODES = {"Int32": "i", "Int64": "q"}
+LEADING_NUMBER = re.compile(r"^\s*(\d[\d \xa0]*)")
+
+
+def parse_int(value, limit):
+    """
+    Úvodní číslo hodnoty jako int ("81 kW" -> 81, "98 500" -> 98500).
+    "Nezjištěno", nečíselné hodnoty a čísla nad limit vrací None.
+    """
+    if value is None:
+        return None
+    if isinstance(value, int):
+        return value if 0 <= value <= limit else None
+    match = LEADING_NUMBER.match(str(value))
+    if not match:
+        return None
+    number = int(match.group(1).replace(" ", "").replace("\xa0", ""))
+    return number if number <= limit else None
+
+
+class _Column:
+    """
+    Jeden sloupec: typované pole hodnot + bitmapa platnosti ve formátu Arrow
+    (bit i = 1 znamená, že hodnota i není NA).
+    """
+
+    def __init__(self, typecode):
+        self.values = array(typecode)
+        self.validity = bytearray()
+        self.null_count = 0
+
+    def append(self, value):
+        n = len(self.values)
+        try:
+            self.values.append(-1 if value is None else value)
+        except BufferError:
+            # Pole sdílí paměť s dříve vráceným DataFrame/Table – další data jdou do kopie
+            self.values = array(self.values.typecode, self.values)
+            self.validity = bytearray(self.validity)
+            self.values.append(-1 if value is None else value)
+        if n % 8 == 0:
+            self.validity.append(0)
+        if value is None:
+            self.null_count += 1
+        else:
+            self.validity[n >> 3] |= 1 << (n & 7)
+
+    def mask(self):
+        # pandas chce opačnou masku (True = NA) po bajtech, ne po bitech
+        bits = np.unpackbits(np.frombuffer(self.validity, dtype=np.uint8), bitorder="little")
+        return bits[:len(self.values)] == 0
+
+    def arrow(self, arrow_type):
+        return pa.Array.from_buffers(arrow_type, len(self.values),
+                                     [pa.py_buffer(self.validity), pa.py_buffer(self.values)],
+                                     null_count=self.null_count)
+
+
+class _DictColumn(_Column):
+    """
+    Slovníkově kódovaný textový sloupec: pole kódů int32 + seznam unikátních hodnot.
+    """
+
+    def __init__(self):
+        super().__init__("i")
+        self.dictionary = []
+        self.codes = {}
+
+    def append(self, value):
+        if value is None or (isinstance(value, float) and value != value):
+            super().append(None)
+            return
+        value = str(value)
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.dictionary)
+            self.dictionary.append(value)
+        super().append(code)
+
+
+class RecordStore:
+    """
+    Kompaktní sloupcové úložiště naparsovaných inzerátů místo seznamu slovníků.
+
+    Číselné sloupce (Rok, Najeté km, Výkon (kW) jako int32, Cena jako int64) jsou
+    typovaná pole s bitmapou platnosti – NA místo řetězce "Nezjištěno".
+    Značka, Model, Palivo a Převodovka jsou slovníkově kódované (každá varianta
+    textu je v paměti jen jednou). Textové "Nezjištěno" zůstává jako běžná hodnota
+    slovníku – typy výstupu určuje schema.SCHEMA.
+
+    to_pandas() a to_arrow() sdílí paměť s úložištěm (číselná pole a kódy se
+    nekopírují). Další append do sdíleného sloupce si pole nejdřív zkopíruje,
+    takže dříve vrácená data se nezmění.
+    """
+
+    def __init__(self, keep_urls=False):
+        self.keep_urls = keep_urls
+        self.clear()
+
+    def clear(self):
+        self.columns = {}
+        for col, dtype in SCHEMA.items():
+            self.columns[col] = _Column(ARRAY_TYPECODES[dtype]) if dtype in INT_LIMITS else _DictColumn()
+        self.urls = []
+        self.size = 0
+
+    def append(self, record):
+        for col, dtype in SCHEMA.items():
+            value = record.get(col)
+            if dtype in INT_LIMITS:
+                value = parse_int(value, INT_LIMITS[dtype]) if value != UNKNOWN else None
+            self.columns[col].append(value)
+        if self.keep_urls:
+            self.urls.append(record.get("URL"))
+        self.size += 1
+
+    def extend(self, records):
+        for record in records:
+            self.append(record)
+
+    def __len__(self):
+        return self.size
+
+    def nbytes(self):
+        """
+        Přibližná velikost dat v bajtech (pole, bitmapy, slovníky).
+        """
+        total = 0
+        for column in self.columns.values():
+            total += column.values.itemsize * len(column.values) + len(column.validity)
+            if isinstance(column, _DictColumn):
+                total += sum(len(v.encode("utf-8")) for v in column.dictionary)
+        return total
+
+    def to_pandas(self):
+        """
+        DataFrame se sloupci COLUMNS a typy podle schema.SCHEMA.
+        """
+        data = {}
+        for col, dtype in SCHEMA.items():
+            column = self.columns[col]
+            values = np.frombuffer(column.values, dtype=np.int32 if column.values.typecode == "i" else np.int64)
+            if isinstance(column, _DictColumn):
+                # Kódy -1 jsou v pandas NA
+                series = pd.Categorical.from_codes(values, categories=column.dictionary)
+                data[col] = series if dtype == "category" else pd.array(series.astype(object), dtype=dtype)
+            else:
+                data[col] = pd.arrays.IntegerArray(values, column.mask())
+        df = pd.DataFrame(data, columns=COLUMNS, copy=False)
+        if self.keep_urls:
+            df.insert(0, "URL", self.urls)
+        return df
+
+    def to_arrow(self):
+        """
+        pyarrow Table podle schema.ARROW_SCHEMA (Značka a Model se dekódují na string).
+        """
+        if pa is None:
+            raise ValueError("to_arrow() vyžaduje nainstalovaný balíček pyarrow.")
+        arrays = []
+        for field in ARROW_SCHEMA:
+            column = self.columns[field.name]
+            if isinstance(column, _DictColumn):
+                indices = column.arrow(pa.int32())
+                arr = pa.DictionaryArray.from_arrays(indices, pa.array(column.dictionary, type=pa.string()))
+                if not pa.types.is_dictionary(field.type):
+                    arr = arr.cast(field.type)
+            else:
+                arr = column.arrow(field.type)
+            arrays.append(arr)
+        return pa.Table.from_arrays(arrays, schema=ARROW_SCHEMA.with_metadata(_pandas_metadata()))
+
+
+@lru_cache(maxsize=None)
+def _pandas_metadata():
+    # Metadata pro pandas (nullable inty, kategorie) – bez nich by read_parquet vrátil floaty
+    empty = RecordStore().to_pandas()
+    return pa.Table.from_pandas(empty, schema=ARROW_SCHEMA, preserve_index=False).schema.metadata
@@ -0,0 +1,104 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlsplit
+
+import aaaauto_scraper
+import sauto_scraper
+from dedup_index import DedupIndex, is_empty_record
+from raw_cache import RawCache, load_blob
+from sink import open_sink
+
+# Parser detailu podle hostu URL
+PARSERS = {
+    "sauto.cz": sauto_scraper.parse_sauto_html,
+    "aaaauto.cz": aaaauto_scraper.parse_aaaauto_html,
+}
+
+
+def parser_for(url):
+    host = urlsplit(url).netloc
+    for domain, parse in PARSERS.items():
+        if host == domain or host.endswith("." + domain):
+            return domain, parse
+    return None, None
+
+
+def reparse_batch(items, backend=None):
+    """
+    Rozbalí a naparsuje dávku (url, cesta k souboru) z cache, vrací seznam záznamů.
+    Běží v procesech poolu – čte soubory sám, přes rouru jdou jen hotové záznamy.
+    """
+    records = []
+    for url, path in items:
+        _, parse = parser_for(url)
+        try:
+            records.append(parse(url, load_blob(path), backend))
+        except Exception as e:
+            print(f"Chyba při parsování {url}: {e}")
+    return records
+
+
+def reparse_cache(cache_paths, outputs, processes=None, batch_size=64, backend=None):
+    """
+    Přeparsuje všechny stránky z RawCache (jedné cesty nebo seznamu cest, např.
+    raw_cache/sauto a raw_cache/aaaauto z run_pipeline.py) bez přístupu k síti, paralelně
+    v processes procesech (None = počet jader). outputs mapuje doménu
+    ("sauto.cz", "aaaauto.cz") na výstupní soubor (CSV nebo ".parquet").
+    Vrací počet uložených (deduplikovaných) záznamů pro každou doménu.
+    """
+    if isinstance(cache_paths, str):
+        cache_paths = [cache_paths]
+    entries = []
+    for cache_path in cache_paths:
+        cache = RawCache(cache_path)
+        try:
+            entries.extend(cache.entries())
+        finally:
+            cache.close()
+
+    batches = {}
+    for url, path in entries:
+        domain, _ = parser_for(url)
+        if domain in outputs:
+            batches.setdefault(domain, []).append((url, path))
+
+    sinks = {domain: open_sink(output) for domain, output in outputs.items()}
+    counts = {domain: 0 for domain in outputs}
+    start = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            for domain, items in batches.items():
+                chunks = [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+                # Stejná deduplikace jako při crawlu
+                dedup = DedupIndex()
+                for records in pool.map(reparse_batch, chunks, [backend] * len(chunks)):
+                    for record in records:
+                        if not is_empty_record(record) and dedup.add_record(record):
+                            sinks[domain].write(record)
+                            counts[domain] += 1
+    finally:
+        for sink in sinks.values():
+            sink.close()
+    elapsed = time.perf_counter() - start
+    total = len(entries)
+    print(f"Přeparsováno {total} stránek za {elapsed:.1f} s ({total / elapsed if elapsed else 0:.0f} stránek/s).")
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Hromadné přeparsování stránek z RawCache bez crawlu")
+    parser.add_argument("--cache", nargs="+", default=["raw_cache"],
+                        help="adresář(e) RawCache (z run_pipeline.py raw_cache/sauto raw_cache/aaaauto)")
+    parser.add_argument("--sauto-output", default="auta_sauto_reparsed.csv")
+    parser.add_argument("--aaaauto-output", default="auta_aaaauto_reparsed.csv")
+    parser.add_argument("--processes", type=int, default=None, help="počet procesů (výchozí počet jader)")
+    parser.add_argument("--backend", default=None, help="HTML backend (lxml / bs4)")
+    args = parser.parse_args()
+
+    for cache_path in args.cache:
+        if not os.path.isdir(cache_path):
+            raise SystemExit(f"Cache '{cache_path}' neexistuje.")
+    reparse_cache(args.cache, {"sauto.cz": args.sauto_output, "aaaauto.cz": args.aaaauto_output},
+                  processes=args.processes, backend=args.backend)
@@ -1,8 +1,19 @@
-import requests
-from bs4 import BeautifulSoup
-import time
+import argparse
 import pandas as pd
-from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import html_parsers
+import http_client
+import metrics
+from checkpoint import Checkpoint, checkpoint_path
+from crawl_engine import CrawlEngine
+from dedup_index import DedupIndex
+from field_parsers import parse_km, parse_power, parse_price, parse_year
+from normalization import UNKNOWN, fuel_rule, transmission_rule
+from rate_limiter import AdaptiveRateLimiter
+from raw_cache import RawCache
+from schema import COLUMNS
+from seen_index import SeenIndex
+from sink import open_sink, read_output
 
 pd.set_option('display.max_colwidth', None)
 
@@ -10,20 +21,25 @@ headers = {
     "User-Agent": "Mozilla/5.0"
 }
 
-def get_listing_links(listing_url):
+# Sdílená session s keep-alive – velikost poolu se nastaví podle max_workers
+session = http_client.create_session(pool_size=10, headers=headers)
+
+# Tempo požadavků na sauto.cz – sdílené listingem i detaily, přizpůsobuje se odezvě webu
+limiter = AdaptiveRateLimiter()
+
+def fetch_response(url, headers=None, budget=None):
     """
-    Získá odkazy na detaily aut z jedné stránky Sauto (kde je seznam inzerátů)
-    a odstraní duplicitní URL.
+    Stáhne stránku a vrátí celou odpověď (None při chybě) – pro CrawlEngine,
+    který potřebuje surové bytes i hlavičky ETag / Last-Modified.
     """
-    try:
-        response = requests.get(listing_url, headers=headers, timeout=10)
-        response.raise_for_status()
-    except Exception as e:
-        print(f"Chyba při načítání listingu {listing_url}: {e}")
-        return []
-
-    soup = BeautifulSoup(response.text, "html.parser")
-    cars = soup.find_all("a", class_="sds-surface sds-surface--clickable sds-surface--00 c-item__link")
+    return http_client.fetch(session, url, headers=headers, timeout=10, limiter=limiter, budget=budget)
+
+def extract_listing_links(html, backend=None):
+    """
+    Vytáhne z HTML listingu Sauto odkazy na detaily aut (bez duplicit).
+    """
+    doc = html_parsers.parse(html, backend)
+    cars = doc.find_all("a", "sds-surface sds-surface--clickable sds-surface--00 c-item__link")
     links = []
     for car in cars:
         href = car.get("href")
@@ -34,22 +50,13 @@ def get_listing_links(listing_url):
     # Odstraníme duplicity URL
     return list(set(links))
 
-def parse_sauto_detail(url):
+def brand_and_model(url, title_text):
     """
-    Stáhne a naparsuje detail inzerátu z Sauto.
-    Vrací inzerát jako slovník s klíči: URL, Značka, Model, Rok, Najeté km, Cena, Palivo, Převodovka, Výkon (kW).
+    Značka a model z titulku inzerátu (karty i detailu), aby oba zdroje dávaly
+    stejný záznam. Obsahuje-li titulek čárku nebo chybí, bere se značka a model z URL.
     """
-    # Defaultní hodnoty
     brand = "Nezjištěno"
     model = "Nezjištěno"
-    year_val = "Nezjištěno"
-    mileage_val = "Nezjištěno"
-    price_val = "Nezjištěno"
-    fuel_val = "Nezjištěno"
-    gearbox_val = "Nezjištěno"
-    power_kw = "Nezjištěno"
-
-    # Fallback z URL (pokud se nepodaří nic najít přímo na stránce)
     fallback_brand = None
     fallback_model = None
     try:
@@ -60,30 +67,7 @@ def parse_sauto_detail(url):
     except Exception:
         pass
 
-    # Stáhneme stránku
-    try:
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-    except Exception as e:
-        print(f"Chyba při načítání detailu {url}: {e}")
-        return {
-            "URL": url,
-            "Značka": brand,
-            "Model": model,
-            "Rok": year_val,
-            "Najeté km": mileage_val,
-            "Cena": price_val,
-            "Palivo": fuel_val,
-            "Převodovka": gearbox_val,
-            "Výkon (kW)": power_kw
-        }
-
-    soup = BeautifulSoup(response.text, "html.parser")
-
-    # 1) Značka a Model z titulku
-    title_el = soup.find("h1", class_="c-item-title")
-    if title_el:
-        title_text = title_el.get_text(strip=True)
+    if title_text:
         if "," in title_text:
             parts = title_text.split(",", 1)
             if fallback_brand and fallback_model:
@@ -106,91 +90,186 @@ def parse_sauto_detail(url):
             model = fallback_model
 
     # Pokud se v modelu vyskytuje čárka, ořízneme ji
-    if isinstance(model, str) and "," in model:
+    if "," in model:
         model = model.split(",", 1)[0].strip()
+    return brand, model
+
+def parse_sauto_card(url, card):
+    """
+    Sestaví záznam z karty inzerátu v listingu (název, "rok, km[, palivo, ...]", cena).
+    Co karta neukazuje, zůstane "Nezjištěno" – doplní se případně z detailu.
+    """
+    record = empty_record(url)
+    name_el = card.find("h3", "c-item__name")
+    record["Značka"], record["Model"] = brand_and_model(url, name_el.text() if name_el else None)
+
+    info_el = card.find("div", "c-item__info")
+    if info_el:
+        for p in info_el.text(" ").split(","):
+            p_clean = p.strip()
+            p_lower = p_clean.lower()
+            year = parse_year(p_clean)
+            if year is not None:
+                record["Rok"] = year
+            elif p_lower.endswith("km"):
+                km = parse_km(p_clean)
+                if km is not None:
+                    record["Najeté km"] = km
+            elif p_lower.endswith("kw"):
+                power = parse_power(p_clean)
+                if power is not None:
+                    record["Výkon (kW)"] = power
+            elif fuel_rule(p_clean) != UNKNOWN:
+                record["Palivo"] = p_clean
+            elif transmission_rule(p_clean) != UNKNOWN:
+                record["Převodovka"] = p_clean
+
+    price_el = card.find("div", "c-item__price")
+    if price_el:
+        price = parse_price(price_el.text())
+        if price is not None:
+            record["Cena"] = price
+    return record
+
+def extract_listing_cards(html, backend=None):
+    """
+    Vytáhne z listingu Sauto záznamy rovnou z karet inzerátů (bez duplicit URL).
+    Karty nesou jen rok, nájezd a cenu – frontier podle nich pozná změněné inzeráty.
+    """
+    doc = html_parsers.parse(html, backend)
+    cards = {}
+    for car in doc.find_all("a", "sds-surface sds-surface--clickable sds-surface--00 c-item__link"):
+        href = car.get("href")
+        if not href:
+            continue
+        full_url = href if href.startswith("http") else "https://www.sauto.cz" + href
+        if full_url not in cards:
+            cards[full_url] = parse_sauto_card(full_url, car)
+    return list(cards.values())
+
+# Prvky detailu, které parser potřebuje (viz html_parsers.iter_matches)
+DETAIL_TARGETS = (
+    ("h1", "c-item-title"),
+    ("span", "c-a-basic-info__subtitle-info"),
+    ("div", "c-a-basic-info__price"),
+    ("span", "c-basic-info__price"),
+    ("li", "c-car-properties__tile"),
+    ("ul", None),
+)
+TITLE, SUBINFO, PRICE, PRICE_ALT, TILE, LIST = range(len(DETAIL_TARGETS))
+
+# Z dlaždic vlastností se čtou jen tyto popisky (hodnoty ostatních se vůbec nepřevádí na text)
+TILE_LABELS = ("Palivo", "Převodovka", "Výkon")
+
+def find_detail_elements(html, backend=None):
+    """
+    Najde v detailu titulek, podtitulek, cenu a dlaždice vlastností jedním
+    proudovým průchodem. S lxml končí, jakmile je všechno potřebné načtené
+    (uzavře se seznam dlaždic) – zbytek stránky se už neparsuje.
+    Vrací (nalezené prvky podle indexu cíle, seznam dlaždic).
+    """
+    found = {}
+    tiles = []
+    for target, node in html_parsers.iter_matches(html, DETAIL_TARGETS, backend):
+        if target == TILE:
+            tiles.append(node)
+        elif target == LIST:
+            # Seznam s už přečtenými dlaždicemi se uzavřel (pořadí uzavírání u lxml)
+            if tiles and node.find("li", DETAIL_TARGETS[TILE][1]) is not None:
+                if TITLE in found and SUBINFO in found and PRICE in found:
+                    break
+        elif target not in found:
+            found[target] = node
+    return found, tiles
+
+def empty_record(url):
+    """
+    Záznam inzerátu, u kterého se nepodařilo nic zjistit.
+    """
+    return {
+        "URL": url,
+        "Značka": "Nezjištěno",
+        "Model": "Nezjištěno",
+        "Rok": "Nezjištěno",
+        "Najeté km": "Nezjištěno",
+        "Cena": "Nezjištěno",
+        "Palivo": "Nezjištěno",
+        "Převodovka": "Nezjištěno",
+        "Výkon (kW)": "Nezjištěno"
+    }
+
+def parse_sauto_html(url, html, backend=None):
+    """
+    Naparsuje již stažené HTML detailu inzerátu ze Sauto.
+    Pokud je html None (stažení selhalo), vrací prázdný záznam.
+    backend volí HTML parser (viz html_parsers.iter_matches).
+    """
+    if html is None:
+        return empty_record(url)
+
+    # Defaultní hodnoty
+    year_val = "Nezjištěno"
+    mileage_val = "Nezjištěno"
+    price_val = "Nezjištěno"
+    fuel_val = "Nezjištěno"
+    gearbox_val = "Nezjištěno"
+    power_kw = "Nezjištěno"
+
+    laps = metrics.registry.stopwatch("extract_seconds", source="sauto")
+    found, tiles = find_detail_elements(html, backend)
+    laps.lap("scan")
+
+    # 1) Značka a Model z titulku
+    title_el = found.get(TITLE)
+    brand, model = brand_and_model(url, title_el.text() if title_el else None)
+    laps.lap("title")
 
     # 2) Rok a Najeté km z <span class="c-a-basic-info__subtitle-info">
-    subinfo_el = soup.find("span", class_="c-a-basic-info__subtitle-info")
+    subinfo_el = found.get(SUBINFO)
     if subinfo_el:
-        subinfo_text = subinfo_el.get_text(" ", strip=True)
+        subinfo_text = subinfo_el.text(" ")
         subinfo_text = subinfo_text.replace("Ojeté", "").replace("Nové", "").strip()
         parts = subinfo_text.split(",")
         for p in parts:
-            p_clean = p.strip()
-            # Zkusíme formát "5/2014"
-            if "/" in p_clean and year_val == "Nezjištěno":
-                splitted = p_clean.split("/")
-                if len(splitted) == 2:
-                    try:
-                        rok_cislo = int(splitted[1].strip())
-                        if 1900 < rok_cislo < 2100:
-                            year_val = rok_cislo
-                    except:
-                        pass
-            # Pokud je to jen rok (např. "2022")
-            if year_val == "Nezjištěno" and p_clean.isdigit():
-                val = int(p_clean)
-                if 1900 < val < 2100:
-                    year_val = val
+            # Rok ve formátu "5/2014" nebo jen "2022"
+            if year_val == "Nezjištěno":
+                year = parse_year(p)
+                if year is not None:
+                    year_val = year
             # Najeté km
-            if "km" in p_clean.lower() and mileage_val == "Nezjištěno":
-                p_clean2 = (p_clean.lower()
-                            .replace("km", "")
-                            .replace("\xa0", "")
-                            .replace(" ", "")
-                            .strip())
-                try:
-                    mileage_val = int(p_clean2)
-                except:
-                    pass
+            if "km" in p.lower() and mileage_val == "Nezjištěno":
+                km = parse_km(p)
+                if km is not None:
+                    mileage_val = km
+    laps.lap("subinfo")
 
     # 3) Cena
-    price_el = soup.find("div", class_="c-a-basic-info__price")
+    price_el = found.get(PRICE) or found.get(PRICE_ALT)
     if price_el:
-        price_txt = price_el.get_text(strip=True)
-        price_txt = (price_txt
-                     .replace("Kč", "")
-                     .replace("\xa0", "")
-                     .replace(" ", "")
-                     .strip())
-        if price_txt:
-            price_val = price_txt
-    else:
-        price_el = soup.find("span", class_="c-basic-info__price")
-        if price_el:
-            price_txt = price_el.get_text(strip=True)
-            price_txt = (price_txt
-                         .replace("Kč", "")
-                         .replace("\xa0", "")
-                         .replace(" ", "")
-                         .strip())
-            if price_txt:
-                price_val = price_txt
+        price = parse_price(price_el.text())
+        if price is not None:
+            price_val = price
+    laps.lap("price")
 
     # 4) Palivo, Převodovka, Výkon (kW) – z tiles (<li class="c-car-properties__tile">)
-    tiles = soup.find_all("li", class_="c-car-properties__tile")
     tile_data = {}
     for tile in tiles:
-        label_div = tile.find("div", class_="c-car-properties__tile-label")
-        value_div = tile.find("div", class_="c-car-properties__tile-value")
-        if not label_div or not value_div:
+        label_div = tile.find("div", "c-car-properties__tile-label")
+        if not label_div:
             continue
-        label_txt = label_div.get_text(strip=True)
-        value_txt = value_div.get_text(strip=True)
-        normalized_label = label_txt.strip()
+        normalized_label = label_div.text().strip()
+        if normalized_label not in TILE_LABELS:
+            continue
+        value_div = tile.find("div", "c-car-properties__tile-value")
+        if not value_div:
+            continue
+        value_txt = value_div.text()
 
-        # Pokud je to "Výkon", ukládáme nejvyšší hodnotu (pokud jich je víc)
+        # Pokud je to "Výkon", ukládáme nejvyšší hodnotu v kW (pokud jich je víc)
         if normalized_label == "Výkon":
-            try:
-                current_val = int(tile_data.get("Výkon", "0").replace("kW", "").replace(" ", ""))
-            except:
-                current_val = 0
-            try:
-                new_val = int(value_txt.replace("kW", "").replace(" ", ""))
-            except:
-                new_val = 0
-            if new_val > current_val:
-                tile_data["Výkon"] = value_txt
+            power = parse_power(value_txt)
+            if power is not None and power > tile_data.get("Výkon", 0):
+                tile_data["Výkon"] = power
         else:
             if normalized_label not in tile_data:
                 tile_data[normalized_label] = value_txt
@@ -198,8 +277,9 @@ def parse_sauto_detail(url):
     fuel_val = tile_data.get("Palivo", "Nezjištěno")
     gearbox_val = tile_data.get("Převodovka", "Nezjištěno")
     power_kw = tile_data.get("Výkon", "Nezjištěno")
+    laps.lap("tiles")
 
-    return {
+    record = {
         "URL": url,
         "Značka": brand,
         "Model": model,
@@ -210,99 +290,152 @@ def parse_sauto_detail(url):
         "Převodovka": gearbox_val,
         "Výkon (kW)": power_kw
     }
+    metrics.registry.count_missing(record, "sauto")
+    return record
 
-def scrape_sauto_one_page(listing_url, max_workers=10):
+def print_sauto_record(car_data):
     """
-    Zpracuje jednu stránku Sauto, najde odkazy na auta a paralelně naparsuje jejich detaily.
+    Formátovaný výpis inzerátu včetně URL.
     """
-    links = get_listing_links(listing_url)
-    print(f"Na stránce '{listing_url}' nalezeno {len(links)} inzerátů.")
-    results = []
-    seen = set()  # pokud chceme deduplikovat
-
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        future_to_url = {executor.submit(parse_sauto_detail, link): link for link in links}
-        for future in as_completed(future_to_url):
-            link = future_to_url[future]
-            try:
-                car_data = future.result()
-                # Dedup klíč (můžete vypnout, pokud nechcete)
-                key = (
-                    car_data["Značka"],
-                    car_data["Model"],
-                    car_data["Rok"],
-                    car_data["Najeté km"],
-                    car_data["Cena"],
-                    car_data["Palivo"],
-                    car_data["Převodovka"],
-                    car_data["Výkon (kW)"]
-                )
-                if key in seen:
-                    continue
-                seen.add(key)
-                results.append(car_data)
-
-                # Formátovaný výpis včetně URL
-                print("URL:        ", car_data["URL"])
-                print("Značka:     ", car_data["Značka"])
-                print("Model:      ", car_data["Model"])
-                print("Rok:        ", car_data["Rok"])
-                print("Najeté km:  ", car_data["Najeté km"])
-                print("Cena:       ", f"{car_data['Cena']} Kč" if car_data["Cena"] != "Nezjištěno" else "Nezjištěno")
-                print("Palivo:     ", car_data["Palivo"])
-                print("Převodovka: ", car_data["Převodovka"])
-                print("Výkon (kW): ", car_data["Výkon (kW)"])
-                print("-" * 60)
-
-            except Exception as e:
-                print(f"Chyba při parsování detailu {link}: {e}")
-
-    return results
+    print("URL:        ", car_data["URL"])
+    print("Značka:     ", car_data["Značka"])
+    print("Model:      ", car_data["Model"])
+    print("Rok:        ", car_data["Rok"])
+    print("Najeté km:  ", car_data["Najeté km"])
+    print("Cena:       ", f"{car_data['Cena']} Kč" if car_data["Cena"] != "Nezjištěno" else "Nezjištěno")
+    print("Palivo:     ", car_data["Palivo"])
+    print("Převodovka: ", car_data["Převodovka"])
+    print("Výkon (kW): ", car_data["Výkon (kW)"])
+    print("-" * 60)
+
+def sauto_page_urls(listing_url_base, max_pages, start_page=1):
+    """
+    Generuje URL stránek s inzeráty (1. stránka je bez parametru page).
+    """
+    for page in range(start_page, max_pages + 1):
+        yield listing_url_base if page == 1 else f"{listing_url_base}?page={page}"
 
 def scrape_sauto_min_inzeraty(listing_url_base,
                               min_inzeraty=50,
                               max_pages=2,
-                              max_workers=10):
+                              max_workers=10,
+                              parse_processes=None,
+                              index_path=None,
+                              index_max_age=None,
+                              output="auta_sauto.csv",
+                              resume=False,
+                              buffer_size=500,
+                              verbose=False,
+                              metrics_path=None,
+                              prefetch_pages=2,
+                              dedup=None,
+                              on_record=None,
+                              raw_cache_path=None,
+                              max_requests=None,
+                              frontier_size=None):
     """
     Prochází více stránek (až max_pages) a sbírá inzeráty.
     Pokud se nasbírá min_inzeraty, končí.
-    Výsledná data se uloží do CSV, ale sloupec URL odstraníme.
+    Listing a detaily běží přes CrawlEngine jako jedna pipeline – další stránka
+    se načítá, zatímco workery ještě stahují detaily z předchozí.
+    Detaily se stahují jako bytes a parsují v parse_processes procesech (None = počet jader).
+    S index_path je crawl inkrementální (viz SeenIndex) – inzeráty ověřené před méně
+    než index_max_age sekundami se nestahují, ostatní se stahují podmíněně.
+    Výsledná data se průběžně zapisují do output po buffer_size řádcích (bez sloupce URL,
+    typovaně podle sink.SCHEMA) – do CSV, nebo do Parquet datasetu, pokud output
+    končí na ".parquet". Vedle se ukládá checkpoint; s resume=True crawl pokračuje.
+    Místo výpisu každého inzerátu (verbose=True) se průběžně vypisuje jen postup;
+    s metrics_path se na konci uloží metriky crawlu (viz metrics.Metrics.export).
+    prefetch_pages je počet listing stránek stahovaných dopředu.
+    Duplicity (podle ID inzerátu před stažením a podle otisku záznamu po naparsování)
+    hlídá dedup – předáním stejného DedupIndex do obou scraperů se hlídají i napříč zdroji.
+    on_record(záznam) se volá pro každý uložený inzerát (např. pro průběžné čištění).
+    S raw_cache_path se surové HTML detailů ukládá do RawCache pro pozdější přeparsování.
+    max_requests omezuje počet HTTP požadavků na běh (listing nejvýš polovinou).
+    Detaily se stahují podle priority (frontier.Frontier): nové inzeráty, pak ty,
+    u kterých karta v listingu ukazuje změnu (s index_path), pak nejdéle neověřené;
+    frontier_size je okno řazených odkazů (s max_requests výchozí všechny).
     """
-    all_results = []
-    page = 1
-    while page <= max_pages:
-        page_url = listing_url_base if page == 1 else f"{listing_url_base}?page={page}"
-        print(f"\n==== SCRAPUJI STRÁNKU č.{page}: {page_url} ====")
-        page_results = scrape_sauto_one_page(page_url, max_workers=max_workers)
-        if not page_results:
-            print("Žádné další inzeráty – končím.")
-            break
-        all_results.extend(page_results)
-        print(f"Aktuálně nasbíráno {len(all_results)} inzerátů.\n")
-        if len(all_results) >= min_inzeraty:
-            print(f"Dosaženo {min_inzeraty} inzerátů – končím.")
-            break
-        page += 1
-        time.sleep(2)
-
-    # Vytvoříme DataFrame
-    df = pd.DataFrame(all_results)
-
-    # Sloupec URL nechceme v CSV, proto ho před uložením odstraníme
-    if "URL" in df.columns:
-        df.drop(columns=["URL"], inplace=True)
-
-    df.to_csv("auta_sauto.csv", index=False, encoding="utf-8-sig")
-    print(f"\nHotovo! Uloženo {len(df)} záznamů do 'auta_sauto.csv'.")
-    return df
+    progress = metrics.Progress("Sauto")
+    dedup = dedup if dedup is not None else DedupIndex()
+    forward = on_record
+
+    def on_record(car_data):
+        if verbose:
+            print_sauto_record(car_data)
+        progress.update()
+        if forward is not None:
+            forward(car_data)
+        return True
+
+    sink = open_sink(output, append=resume, buffer_size=buffer_size)
+    checkpoint = Checkpoint(checkpoint_path(output), sink, resume=resume)
+    remaining = min_inzeraty - sink.rows_written
+
+    http_client.mount_pool(session, max_workers)
+    index = SeenIndex(index_path, max_age=index_max_age) if index_path else None
+    raw_cache = RawCache(raw_cache_path) if raw_cache_path else None
+    engine = CrawlEngine(fetch_response, max_workers=max_workers,
+                         parse_processes=parse_processes, index=index,
+                         prefetch_pages=prefetch_pages, dedup=dedup,
+                         raw_cache=raw_cache, max_requests=max_requests,
+                         frontier_size=frontier_size)
+    try:
+        if remaining > 0:
+            engine.run(
+                sauto_page_urls(listing_url_base, max_pages, start_page=checkpoint.next_page),
+                extract_listing_links,
+                parse_sauto_html,
+                min_items=remaining,
+                on_record=on_record,
+                checkpoint=checkpoint,
+                first_page=checkpoint.next_page,
+                keep_results=False,
+                # S indexem podle karet listingu frontier pozná změněné inzeráty
+                extract_cards=extract_listing_cards if index is not None else None
+            )
+    finally:
+        checkpoint.close()
+        if index is not None:
+            index.close()
+        if raw_cache is not None:
+            raw_cache.close()
+        if metrics_path:
+            metrics.registry.export(metrics_path)
+
+    print(f"\nHotovo! Uloženo {sink.rows_written} záznamů do '{output}'.")
+    return read_output(output) if sink.rows_written else pd.DataFrame(columns=COLUMNS)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scraper inzerátů ze Sauto.cz")
+    parser.add_argument("--resume", action="store_true",
+                        help="pokračovat v přerušeném crawlu podle checkpointu")
+    parser.add_argument("--verbose", action="store_true",
+                        help="vypisovat každý nasbíraný inzerát")
+    parser.add_argument("--metrics", default="metrics_sauto.json",
+                        help="kam uložit metriky crawlu (.json nebo .prom)")
+    parser.add_argument("--raw-cache", default=None,
+                        help="adresář pro komprimované HTML detailů (pro reparse_cache.py)")
+    parser.add_argument("--max-requests", type=int, default=None,
+                        help="nejvýš tolik HTTP požadavků (včetně opakování) za běh; nejdřív se projde "
+                             "listing (nejvýš polovina rozpočtu), pak detaily – nové a změněné napřed")
+    parser.add_argument("--index-max-age", type=float, default=None, metavar="HODINY",
+                        help="inzeráty ověřené v indexu před méně hodinami vůbec nestahovat")
+    args = parser.parse_args()
+
     base_url = "https://www.sauto.cz/inzerce/osobni"
     df = scrape_sauto_min_inzeraty(
         listing_url_base=base_url,
         min_inzeraty=10000,    # pro rychlejší test
         max_pages=20000000,        # pro rychlejší test
-        max_workers=5
+        max_workers=5,
+        index_path="crawl_index.sqlite",
+        index_max_age=args.index_max_age * 3600 if args.index_max_age else None,
+        resume=args.resume,
+        verbose=args.verbose,
+        metrics_path=args.metrics,
+        raw_cache_path=args.raw_cache,
+        max_requests=args.max_requests
     )
 
     print("\nNáhled na prvních 5 řádků:")
@@ -0,0 +1,34 @@
+try:
+    import pyarrow as pa
+except ImportError:  # pyarrow je potřeba jen pro Parquet výstup
+    pa = None
+
+COLUMNS = ["Značka", "Model", "Rok", "Najeté km", "Cena", "Palivo", "Převodovka", "Výkon (kW)"]
+
+# Typové schéma výstupu – čísla jako nullable inty místo "Nezjištěno",
+# palivo a převodovka jako kategorie (v Parquetu slovníkově kódované)
+SCHEMA = {
+    "Značka": "string",
+    "Model": "string",
+    "Rok": "Int32",
+    "Najeté km": "Int32",
+    "Cena": "Int64",
+    "Palivo": "category",
+    "Převodovka": "category",
+    "Výkon (kW)": "Int32",
+}
+
+INT_LIMITS = {"Int32": 2 ** 31 - 1, "Int64": 2 ** 63 - 1}
+
+ARROW_SCHEMA = None
+if pa is not None:
+    ARROW_SCHEMA = pa.schema([
+        ("Značka", pa.string()),
+        ("Model", pa.string()),
+        ("Rok", pa.int32()),
+        ("Najeté km", pa.int32()),
+        ("Cena", pa.int64()),
+        ("Palivo", pa.dictionary(pa.int32(), pa.string())),
+        ("Převodovka", pa.dictionary(pa.int32(), pa.string())),
+        ("Výkon (kW)", pa.int32()),
+    ])
@@ -0,0 +1,135 @@
+import hashlib
+import json
+import sqlite3
+import time
+
+import metrics
+
+
+def content_hash(content):
+    """
+    Otisk obsahu stránky – podle něj poznáme nezměněný inzerát i bez ETagu.
+    """
+    return hashlib.sha1(content).hexdigest()
+
+
+class SeenIndex:
+    """
+    Perzistentní SQLite index už stažených inzerátů pro inkrementální crawl.
+
+    Pro každé URL drží ETag, Last-Modified, hash obsahu a naparsovaný záznam.
+    Při dalším běhu se inzerát buď přeskočí úplně (pokud je mladší než max_age
+    sekund), nebo se stáhne podmíněně (If-None-Match / If-Modified-Since);
+    při 304 nebo stejném hashi se použije uložený záznam bez parsování.
+
+    Zápisy se drží v paměti a po commit_every kusech se zapíšou jednou krátkou
+    transakcí – zámek databáze se tak nedrží mezi zápisy a index může sdílet
+    víc procesů (WAL, na zámek se čeká až timeout sekund). Když se zápis přesto
+    nepovede (zamčená databáze), zůstane v bufferu a zkusí se při dalším.
+    """
+
+    def __init__(self, path="crawl_index.sqlite", max_age=None, commit_every=100, timeout=30.0):
+        self.path = path
+        self.max_age = max_age
+        self.commit_every = commit_every
+        self._writes = []
+        self.conn = sqlite3.connect(path, timeout=timeout)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS seen (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                content_hash TEXT,
+                record TEXT,
+                fetched_at REAL
+            )
+        """)
+        self.conn.commit()
+
+    def get(self, url):
+        """
+        Vrátí uložený stav URL jako slovník, nebo None.
+        """
+        row = self.conn.execute(
+            "SELECT etag, last_modified, content_hash, record, fetched_at FROM seen WHERE url = ?",
+            (url,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {
+            "etag": row[0],
+            "last_modified": row[1],
+            "content_hash": row[2],
+            "record": json.loads(row[3]) if row[3] else None,
+            "fetched_at": row[4],
+        }
+
+    def is_fresh(self, entry):
+        """
+        True, pokud je uložený záznam dost čerstvý na to, aby se URL vůbec nestahovalo.
+        """
+        if self.max_age is None or entry is None or entry["record"] is None:
+            return False
+        return time.time() - entry["fetched_at"] < self.max_age
+
+    def conditional_headers(self, entry):
+        """
+        Hlavičky pro podmíněný GET podle uloženého ETagu / Last-Modified.
+        """
+        headers = {}
+        if entry is None or entry["record"] is None:
+            return headers
+        if entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def store(self, url, record, etag=None, last_modified=None, content_hash=None):
+        """
+        Uloží (nebo přepíše) stav URL včetně naparsovaného záznamu.
+        """
+        self._write(
+            "INSERT OR REPLACE INTO seen (url, etag, last_modified, content_hash, record, fetched_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (url, etag, last_modified, content_hash,
+             json.dumps(record, ensure_ascii=False), time.time())
+        )
+
+    def touch(self, url, etag=None, last_modified=None):
+        """
+        Označí URL jako ověřené teď (nezměněné), případně aktualizuje validátory.
+        """
+        self._write(
+            "UPDATE seen SET fetched_at = ?, etag = COALESCE(?, etag), "
+            "last_modified = COALESCE(?, last_modified) WHERE url = ?",
+            (time.time(), etag, last_modified, url)
+        )
+
+    def _write(self, sql, params):
+        self._writes.append((sql, params))
+        if len(self._writes) >= self.commit_every:
+            self.flush()
+
+    def flush(self):
+        """
+        Zapíše nahromaděné zápisy jednou transakcí. Vrací False, pokud byla
+        databáze zamčená i po timeoutu – zápisy pak zůstanou na další pokus.
+        """
+        if not self._writes:
+            return True
+        try:
+            with self.conn:
+                for sql, params in self._writes:
+                    self.conn.execute(sql, params)
+        except sqlite3.OperationalError as e:
+            metrics.registry.inc("index_errors_total")
+            print(f"Index '{self.path}' se nepodařilo zapsat ({e}), zkusím to znovu později.")
+            return False
+        self._writes = []
+        return True
+
+    def close(self):
+        self.flush()
+        self.conn.close()
@@ -0,0 +1,113 @@
+import glob
+import os
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow je potřeba jen pro Parquet výstup
+    pa = None
+
+import metrics
+from record_store import RecordStore
+
+
+class CsvSink:
+    """
+    Průběžně připisuje záznamy do CSV po dávkách buffer_size řádků,
+    takže v paměti nikdy není víc než jedna dávka. Sloupec URL se do CSV neukládá.
+    Dávka se drží sloupcově v RecordStore, ne jako seznam slovníků.
+    """
+
+    def __init__(self, path, append=False, buffer_size=500):
+        self.path = path
+        self.buffer_size = buffer_size
+        self.buffer = RecordStore()
+        self.rows_written = 0
+        if append and os.path.exists(path):
+            self.rows_written = len(pd.read_csv(path, usecols=[0]))
+        elif os.path.exists(path):
+            os.remove(path)
+
+    def write(self, record):
+        """
+        Přidá záznam do bufferu. Vrací True, pokud se tím buffer zapsal na disk.
+        """
+        self.buffer.append(record)
+        if len(self.buffer) >= self.buffer_size:
+            with metrics.registry.timer("sink_flush_seconds", sink=type(self).__name__):
+                self.flush()
+            return True
+        return False
+
+    def flush(self):
+        if not self.buffer:
+            return
+        df = self.buffer.to_pandas()
+        new_file = not os.path.exists(self.path)
+        # BOM jen na začátek souboru, při připisování by skončil uprostřed dat
+        df.to_csv(self.path, mode="a", header=new_file, index=False,
+                  encoding="utf-8-sig" if new_file else "utf-8")
+        self.rows_written += len(self.buffer)
+        self.buffer = RecordStore()
+
+    def close(self):
+        self.flush()
+
+
+class ParquetSink(CsvSink):
+    """
+    Zapisuje záznamy do Parquet datasetu (adresář path) – každá dávka buffer_size
+    řádků je samostatný part soubor s jednou row group. Hotový part je vždy
+    kompletní soubor, takže pád crawlu nepoškodí už zapsaná data.
+    pd.read_parquet(path, columns=[...]) pak čte jen potřebné sloupce.
+    """
+
+    def __init__(self, path, append=False, buffer_size=500):
+        if pa is None:
+            raise ValueError("Parquet výstup vyžaduje nainstalovaný balíček pyarrow.")
+        self.path = path
+        self.buffer_size = buffer_size
+        self.buffer = RecordStore()
+        self.rows_written = 0
+        parts = sorted(glob.glob(os.path.join(path, "part-*.parquet")))
+        if append:
+            self.rows_written = sum(pq.ParquetFile(p).metadata.num_rows for p in parts)
+        else:
+            for p in parts:
+                os.remove(p)
+            parts = []
+        os.makedirs(path, exist_ok=True)
+        self.parts = len(parts)
+
+    def flush(self):
+        if not self.buffer:
+            return
+        table = self.buffer.to_arrow()
+        part_name = f"part-{self.parts:05d}.parquet"
+        # Dočasný soubor s tečkou na začátku pyarrow při čtení datasetu ignoruje
+        tmp_path = os.path.join(self.path, "." + part_name + ".tmp")
+        pq.write_table(table, tmp_path, row_group_size=len(table))
+        os.replace(tmp_path, os.path.join(self.path, part_name))
+        self.parts += 1
+        self.rows_written += len(self.buffer)
+        self.buffer = RecordStore()
+
+
+def open_sink(path, append=False, buffer_size=500):
+    """
+    Vybere sink podle přípony výstupu: ".parquet" -> ParquetSink, jinak CSV.
+    """
+    if path.endswith(".parquet"):
+        return ParquetSink(path, append=append, buffer_size=buffer_size)
+    return CsvSink(path, append=append, buffer_size=buffer_size)
+
+
+def read_output(path, columns=None):
+    """
+    Načte výstup sinku (CSV nebo Parquet dataset), volitelně jen vybrané sloupce.
+    """
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path, columns=columns)
+    return pd.read_csv(path, usecols=columns)
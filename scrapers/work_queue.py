@@ -0,0 +1,308 @@
+import ipaddress
+import json
+import sqlite3
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+# Stavy úkolu
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+TASK_FIELDS = ("id", "kind", "source", "url", "page", "last_page")
+
+
+class SqliteWorkQueue:
+    """
+    Sdílená fronta úkolů crawlu (stránky listingu a detaily) pro víc workerů.
+
+    Úkol si worker pronajme přes lease() na lease_seconds sekund a po zpracování
+    ho potvrdí přes ack() (s výsledným záznamem a novými úkoly v jedné transakci),
+    nebo vrátí přes nack(). Úkol, jehož pronájem vypršel (worker spadl), dostane
+    další worker; potvrzení od workera, kterému pronájem mezitím převzal jiný,
+    se ignoruje. Po max_attempts pokusech se úkol vzdá (stav failed).
+
+    URL je v frontě jen jednou (INSERT OR IGNORE), takže stejný detail z víc stránek
+    se stáhne jednou. Výsledky se ukládají do tabulky results a slučují přes merge
+    v crawl_worker.py. Soubor může sdílet víc procesů na jednom stroji; workery
+    na jiných strojích se připojují přes serve_queue / HttpWorkQueue.
+    """
+
+    def __init__(self, path="crawl_queue.sqlite", lease_seconds=300, max_attempts=3):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.lock = threading.Lock()
+        # Transakce řídíme sami (BEGIN IMMEDIATE), aby si dva procesy nepronajaly stejný úkol
+        self.conn = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS tasks (
+                id INTEGER PRIMARY KEY,
+                kind TEXT NOT NULL,
+                source TEXT NOT NULL,
+                url TEXT NOT NULL UNIQUE,
+                page INTEGER,
+                last_page INTEGER,
+                state TEXT NOT NULL DEFAULT 'pending',
+                worker TEXT,
+                lease_until REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT
+            )
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS results (
+                id INTEGER PRIMARY KEY,
+                source TEXT NOT NULL,
+                url TEXT NOT NULL UNIQUE,
+                record TEXT NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS tasks_state ON tasks (state, kind, id)")
+
+    def _insert(self, tasks):
+        cursor = self.conn.executemany(
+            "INSERT OR IGNORE INTO tasks (kind, source, url, page, last_page) VALUES (?, ?, ?, ?, ?)",
+            [(t["kind"], t["source"], t["url"], t.get("page"), t.get("last_page")) for t in tasks]
+        )
+        return cursor.rowcount
+
+    def put(self, tasks):
+        """
+        Přidá úkoly (slovníky s kind, source, url, u listingu i page a last_page).
+        Už známá URL se přeskočí. Vrací počet nově přidaných úkolů.
+        """
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                added = self._insert(tasks)
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+        return added
+
+    def lease(self, worker, limit=1):
+        """
+        Pronajme workeru až limit úkolů (stránky listingu přednostně, jinak v pořadí
+        přidání) včetně úkolů s vypršelým pronájmem. Vrací seznam slovníků.
+        """
+        now = time.time()
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.execute(
+                    "UPDATE tasks SET state = ?, error = 'pronájem vypršel' "
+                    "WHERE state = ? AND lease_until < ? AND attempts >= ?",
+                    (FAILED, LEASED, now, self.max_attempts)
+                )
+                rows = self.conn.execute(
+                    f"SELECT {', '.join(TASK_FIELDS)} FROM tasks "
+                    "WHERE state = ? OR (state = ? AND lease_until < ?) "
+                    "ORDER BY kind = 'detail', id LIMIT ?",
+                    (PENDING, LEASED, now, limit)
+                ).fetchall()
+                self.conn.executemany(
+                    "UPDATE tasks SET state = ?, worker = ?, lease_until = ?, attempts = attempts + 1 WHERE id = ?",
+                    [(LEASED, worker, now + self.lease_seconds, row[0]) for row in rows]
+                )
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+        return [dict(zip(TASK_FIELDS, row)) for row in rows]
+
+    def ack(self, task_id, worker, record=None, tasks=(), follow=()):
+        """
+        Potvrdí hotový úkol: uloží record (pokud není None) a přidá nové úkoly tasks.
+        Úkoly follow (další stránka listingu) se přidají, jen když tasks přinesly
+        aspoň jednu novou URL – opakovaná stránka tak řetěz stránkování ukončí.
+        Vrací False, pokud pronájem mezitím převzal jiný worker (nic se neuloží).
+        """
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self.conn.execute(
+                    "SELECT source, url FROM tasks WHERE id = ? AND state = ? AND worker = ?",
+                    (task_id, LEASED, worker)
+                ).fetchone()
+                if row is None:
+                    self.conn.execute("ROLLBACK")
+                    return False
+                if record is not None:
+                    self.conn.execute(
+                        "INSERT OR REPLACE INTO results (source, url, record) VALUES (?, ?, ?)",
+                        (row[0], row[1], json.dumps(record, ensure_ascii=False))
+                    )
+                if self._insert(tasks) and follow:
+                    self._insert(follow)
+                self.conn.execute("UPDATE tasks SET state = ?, lease_until = NULL WHERE id = ?", (DONE, task_id))
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+        return True
+
+    def nack(self, task_id, worker, error=None):
+        """
+        Vrátí nezpracovaný úkol do fronty (po max_attempts pokusech ho vzdá).
+        """
+        with self.lock:
+            self.conn.execute(
+                "UPDATE tasks SET state = CASE WHEN attempts >= ? THEN ? ELSE ? END, "
+                "lease_until = NULL, error = ? WHERE id = ? AND state = ? AND worker = ?",
+                (self.max_attempts, FAILED, PENDING, error, task_id, LEASED, worker)
+            )
+        return True
+
+    def stats(self):
+        """
+        Počty úkolů podle stavu a počet uložených výsledků.
+        """
+        with self.lock:
+            counts = dict(self.conn.execute("SELECT state, COUNT(*) FROM tasks GROUP BY state").fetchall())
+            counts["results"] = self.conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        for state in (PENDING, LEASED, DONE, FAILED):
+            counts.setdefault(state, 0)
+        return counts
+
+    def results(self, batch_size=1000):
+        """
+        Iteruje uložené výsledky jako (zdroj, záznam) v pořadí uložení.
+        """
+        last_id = 0
+        while True:
+            with self.lock:
+                rows = self.conn.execute(
+                    "SELECT id, source, record FROM results WHERE id > ? ORDER BY id LIMIT ?",
+                    (last_id, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            for row_id, source, record in rows:
+                yield source, json.loads(record)
+            last_id = rows[-1][0]
+
+    def close(self):
+        self.conn.close()
+
+
+class HttpWorkQueue:
+    """
+    Klient fronty na jiném stroji (serve_queue) se stejným rozhraním jako
+    SqliteWorkQueue: put, lease, ack, nack, stats. Výsledky se slučují na stroji
+    se souborem fronty.
+    """
+
+    def __init__(self, url, token=None, timeout=30):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+        if token:
+            self.session.headers["X-Queue-Token"] = token
+
+    def _call(self, method, **payload):
+        response = self.session.post(f"{self.url}/{method}", json=payload, timeout=self.timeout)
+        if response.status_code == 400:
+            # Server úkol odmítl (neplatný zdroj, URL…) – chybu vrací v JSON
+            raise ValueError(response.json().get("error"))
+        response.raise_for_status()
+        return response.json()["result"]
+
+    def put(self, tasks):
+        return self._call("put", tasks=list(tasks))
+
+    def lease(self, worker, limit=1):
+        return self._call("lease", worker=worker, limit=limit)
+
+    def ack(self, task_id, worker, record=None, tasks=(), follow=()):
+        return self._call("ack", task_id=task_id, worker=worker, record=record,
+                          tasks=list(tasks), follow=list(follow))
+
+    def nack(self, task_id, worker, error=None):
+        return self._call("nack", task_id=task_id, worker=worker, error=error)
+
+    def stats(self):
+        return self._call("stats")
+
+    def close(self):
+        self.session.close()
+
+
+# Metody fronty, které server zpřístupní
+REMOTE_METHODS = ("put", "lease", "ack", "nack", "stats")
+
+
+def is_loopback(host):
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def serve_queue(queue, host="127.0.0.1", port=8765, token=None, validate_task=None):
+    """
+    Zpřístupní frontu workerům na jiných strojích (JSON přes HTTP POST /<metoda>).
+    S token musí klient posílat stejnou hodnotu v hlavičce X-Queue-Token; mimo
+    loopback bez tokenu server nenastartuje (kdokoli by mohl přidávat URL ke stažení).
+    validate_task(úkol) vyhodí ValueError pro úkol, který se nemá do fronty dostat
+    (put a ack). Chybný požadavek dostane odpověď 400 s {"error": ...}.
+    Běží do přerušení (Ctrl+C).
+    """
+    if not token and not is_loopback(host):
+        raise ValueError(f"Fronta na {host} (mimo loopback) potřebuje token (--token / CRAWL_QUEUE_TOKEN).")
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            method = self.path.strip("/")
+            if token and self.headers.get("X-Queue-Token") != token:
+                self.send_error(403)
+                return
+            if method not in REMOTE_METHODS:
+                self.send_error(404)
+                return
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                if validate_task is not None:
+                    for task in [*payload.get("tasks", ()), *payload.get("follow", ())]:
+                        validate_task(task)
+                status, body = 200, {"result": getattr(queue, method)(**payload)}
+            except Exception as e:
+                status, body = 400, {"error": f"{type(e).__name__}: {e}"}
+            body = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            # Bez výpisu každého požadavku
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    print(f"Fronta '{getattr(queue, 'path', queue)}' naslouchá na http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def open_queue(spec, token=None, lease_seconds=300):
+    """
+    Vybere backend fronty podle spec: "http://..." -> HttpWorkQueue, jinak
+    cesta k SQLite souboru -> SqliteWorkQueue.
+    """
+    if spec.startswith(("http://", "https://")):
+        return HttpWorkQueue(spec, token=token)
+    return SqliteWorkQueue(spec, lease_seconds=lease_seconds)